@@ -0,0 +1,151 @@
+import os
+import re
+import json
+import logging
+import unicodedata
+from functools import lru_cache
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # dependencia opcional, so necessaria para ler o texto do PDF
+    PdfReader = None
+
+
+# Regras usadas quando nao ha arquivo de configuracao. A ordem define a
+# prioridade: vence a primeira regra que casar com o nome do arquivo.
+REGRAS_PADRAO = [
+    {"padrao": r"comprovante|recibo", "tipo": "Comprovante"},
+    {"padrao": r"demonstrativo|extrato|contracheque", "tipo": "Demonstrativo"},
+    {"padrao": r"autoriza", "tipo": "Autorizacao"},
+    {"padrao": r"requerimento|solicitacao", "tipo": "Requerimento"},
+    {"padrao": r"oficio", "tipo": "Oficio"},
+    {"padrao": r"relatorio", "tipo": "Relatorio"},
+]
+
+ARQUIVO_REGRAS = "regras_tipos.json"
+
+logger = logging.getLogger(__name__)
+
+
+# Construcoes que quebram ou mudam de sentido quando a regra e embutida na
+# expressao combinada: flags globais, grupos nomeados e referencias a grupos.
+_FLAGS_GLOBAIS = re.compile(r"\(\?[aiLmsux]+\)")
+
+
+def _validar_padrao(padrao: str):
+    i = 0
+    while i < len(padrao):
+        if padrao[i] == "\\":
+            if padrao[i + 1:i + 2].isdigit() and padrao[i + 1] != "0":
+                raise ValueError("referencias numericas a grupos (\\1) nao sao suportadas")
+            i += 2
+            continue
+        if padrao.startswith("(?P", i) or padrao.startswith("(?(", i):
+            raise ValueError("grupos nomeados, (?P=...) e condicionais (?(...)) nao sao suportados")
+        if _FLAGS_GLOBAIS.match(padrao, i):
+            raise ValueError("flags globais como (?i) nao sao suportadas; as regras ja ignoram caixa")
+        i += 1
+    re.compile(padrao)
+
+
+def _sem_acento(texto: str) -> str:
+    """Remove acentos para que 'Ofício' case com a regra 'oficio'."""
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+
+
+class ClassificadorTipos:
+    """
+    Mapeia nomes de arquivo (e opcionalmente o texto da primeira pagina)
+    para tipos de documento.
+
+    Todas as regras sao compiladas numa unica expressao ancorada, em que
+    cada regra vira uma alternativa com lookahead; assim cada nome e
+    avaliado numa so chamada de match() e a ordem das regras e respeitada.
+    """
+
+    def __init__(self, regras: list, usar_texto: bool = False):
+        if not isinstance(regras, list) or not regras:
+            raise ValueError("Nenhuma regra de classificacao informada")
+        self.tipos = []
+        alternativas = []
+        for i, regra in enumerate(regras):
+            if not isinstance(regra, dict) or not isinstance(regra.get("padrao"), str) \
+                    or not isinstance(regra.get("tipo"), str):
+                raise ValueError(f"Regra {i + 1} deve ter 'padrao' e 'tipo' em texto: {regra!r}")
+            padrao = _sem_acento(regra["padrao"])
+            try:
+                _validar_padrao(padrao)
+            except (ValueError, re.error) as e:
+                raise ValueError(f"Regra invalida para '{regra['tipo']}': {regra['padrao']} ({e})")
+            self.tipos.append(regra["tipo"])
+            alternativas.append(f"(?=.*?(?:{padrao}))(?P<r{i}>)")
+        try:
+            self._regex = re.compile("^(?:" + "|".join(alternativas) + ")", re.DOTALL | re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"Nao foi possivel combinar as regras: {e}")
+        self.usar_texto = usar_texto and PdfReader is not None
+
+    def _casar(self, texto: str):
+        m = self._regex.match(_sem_acento(texto))
+        if m is None:
+            return None
+        return self.tipos[int(m.lastgroup[1:])]
+
+    def classificar(self, nome_arquivo: str, caminho: str = None):
+        """
+        Retorna o tipo correspondente ou None se nenhuma regra casar. Com
+        caminho, tenta tambem o texto do PDF (ver classificar_texto).
+        """
+        tipo = self._casar(os.path.splitext(nome_arquivo)[0])
+        if tipo is None and caminho:
+            tipo = self.classificar_texto(caminho)
+        return tipo
+
+    def classificar_texto(self, caminho: str):
+        """
+        Classifica pelo texto da primeira pagina do PDF, ou None se o modo
+        estiver desativado. Le o arquivo com pypdf, o que e lento: a
+        interface chama este metodo fora da sua thread.
+        """
+        if not self.usar_texto:
+            return None
+        return self._casar(texto_primeira_pagina(caminho))
+
+
+def texto_primeira_pagina(caminho: str) -> str:
+    try:
+        reader = PdfReader(caminho)
+        if not reader.pages:
+            return ""
+        return reader.pages[0].extract_text() or ""
+    except Exception as e:
+        logger.warning("Nao foi possivel ler o texto de %s: %s", os.path.basename(caminho), e)
+        return ""
+
+
+def carregar_regras(caminho: str = None) -> list:
+    """
+    Le as regras de um JSON no formato [{"padrao": "...", "tipo": "..."}].
+    Sem arquivo, usa REGRAS_PADRAO.
+    """
+    caminho = caminho or os.getenv("SEI_REGRAS_TIPOS", ARQUIVO_REGRAS)
+    if not os.path.isfile(caminho):
+        return REGRAS_PADRAO
+    with open(caminho, encoding="utf-8") as f:
+        regras = json.load(f)
+    logger.info("%d regra(s) de classificacao carregada(s) de %s", len(regras), caminho)
+    return regras
+
+
+@lru_cache(maxsize=1)
+def obter_classificador() -> ClassificadorTipos:
+    """
+    Compila as regras configuradas uma unica vez por execucao. Uma
+    configuracao ilegivel ou invalida cai nas REGRAS_PADRAO com aviso.
+    """
+    usar_texto = os.getenv("SEI_CLASSIFICAR_TEXTO", "").lower() in ("1", "true", "sim")
+    try:
+        return ClassificadorTipos(carregar_regras(), usar_texto=usar_texto)
+    except (OSError, ValueError) as e:
+        logger.warning("Regras de classificacao invalidas, usando as padrao: %s", e)
+        return ClassificadorTipos(REGRAS_PADRAO, usar_texto=usar_texto)
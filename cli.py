@@ -0,0 +1,119 @@
+import os
+import sys
+import argparse
+import getpass
+import logging
+from contextlib import ExitStack
+from dotenv import load_dotenv
+from scheduler import obter_agendador, PRIORIDADES, JanelaHorario
+from pdf_splitter import documentos_divididos, montar_documentos
+from log_config import configurar_logging
+from credenciais import salvar_credencial, obter_senha
+from multi_conta import executar_contas, carregar_lotes
+
+
+logger = logging.getLogger(__name__)
+
+
+def ler_senha(usuario: str) -> str:
+    """Senha do cofre do sistema; SEI_SENHA (.env) so e lida como legado, com aviso."""
+    senha = obter_senha(usuario)
+    if senha:
+        return senha
+    senha = os.getenv("SEI_SENHA")
+    if senha:
+        logger.warning(
+            "SEI_SENHA esta obsoleta e deixara de ser lida; guarde a senha no cofre com "
+            "--salvar-credencial e remova-a do .env"
+        )
+        return senha
+    return getpass.getpass("Senha: ")
+
+
+def executar_pasta(args, parser) -> int:
+    if not args.processo or not args.pasta:
+        parser.error("Informe --processo e --pasta, ou --lotes")
+    if not os.path.isdir(args.pasta):
+        parser.error(f"Pasta invalida: {args.pasta}")
+    documentos = montar_documentos(args.pasta, args.tipo)
+    if not documentos:
+        parser.error("Nenhum PDF encontrado.")
+
+    usuario = args.usuario or input("Usuario: ")
+    senha = ler_senha(usuario)
+    janela = JanelaHorario.de_texto(args.janela) if args.janela else None
+
+    with ExitStack() as pilha:
+        if args.dividir:
+            # as partes temporarias sao apagadas ao sair do bloco
+            try:
+                documentos = pilha.enter_context(documentos_divididos(documentos))
+            except Exception as e:
+                print(f"Falha ao dividir PDFs: {e}")
+                return 1
+
+        job = obter_agendador().submeter(
+            usuario, senha, args.processo, documentos,
+            prioridade=PRIORIDADES[args.prioridade], janela=janela,
+        )
+        try:
+            resultados = job.aguardar()
+        except Exception as e:
+            print(f"Falha na automacao: {e}")
+            return 1
+
+        for doc, ok in zip(documentos, resultados):
+            detalhe = f" ({doc['erro']})" if doc.get("erro") else ""
+            print(f"{'OK  ' if ok else 'ERRO'} {doc['tipo']} | {os.path.basename(doc['caminho'])}{detalhe}")
+    print(f"Espera na fila: {job.espera:.1f}s | Execucao: {job.execucao:.1f}s")
+    return 0 if resultados and all(resultados) else 1
+
+
+def executar_lotes(args, parser) -> int:
+    """Executa em paralelo os lotes de varias contas descritos no JSON de --lotes."""
+    try:
+        janela = JanelaHorario.de_texto(args.janela) if args.janela else None
+        lotes = carregar_lotes(args.lotes, args.tipo, args.prioridade, janela)
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(f"Arquivo de lotes invalido: {e}")
+
+    resumo = executar_contas(lotes, dividir=args.dividir)
+    for usuario, r in resumo.items():
+        print(f"{usuario}: {r['documentos_ok']} OK, {r['documentos_erro']} erro(s), {r['tempo']:.1f}s")
+        for lote in r["lotes"]:
+            print(f"  {lote['processo']}: espera {lote['espera']:.1f}s, execucao {lote['execucao']:.1f}s")
+        for erro in r["erros"]:
+            print(f"  ERRO {erro}")
+    return 0 if all(r["documentos_erro"] == 0 for r in resumo.values()) else 1
+
+
+def main(argv=None):
+    load_dotenv()
+    configurar_logging()
+
+    parser = argparse.ArgumentParser(description="Inclui os PDFs de uma pasta em um processo do SEI via agendador.")
+    parser.add_argument("--processo", help="Nº do processo (Ex: 00001/2026)")
+    parser.add_argument("--pasta", help="Pasta com os arquivos PDF")
+    parser.add_argument("--tipo", default="Documentos", help="Tipo de documento aplicado a todos os PDFs")
+    parser.add_argument("--usuario", default=os.getenv("SEI_USUARIO"), help="Usuario do SEI (padrao: SEI_USUARIO)")
+    parser.add_argument("--prioridade", choices=list(PRIORIDADES), default="normal")
+    parser.add_argument("--janela", help="Faixa de horas permitida para iniciar, ex: 19-7 (padrao dos lotes de --lotes)")
+    parser.add_argument("--dividir", action="store_true",
+                        help="Divide PDFs acima de SEI_LIMITE_UPLOAD_MB em partes antes do envio")
+    parser.add_argument("--lotes", help="JSON com lotes de varias contas, executadas em paralelo")
+    parser.add_argument("--salvar-credencial", action="store_true",
+                        help="Guarda a senha de --usuario no cofre do sistema e sai")
+    args = parser.parse_args(argv)
+
+    if args.salvar_credencial:
+        usuario = args.usuario or input("Usuario: ")
+        salvar_credencial(usuario, getpass.getpass("Senha: "))
+        print(f"Credencial de '{usuario}' guardada.")
+        return 0
+    if args.lotes:
+        return executar_lotes(args, parser)
+    return executar_pasta(args, parser)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
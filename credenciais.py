@@ -0,0 +1,82 @@
+import os
+import re
+import json
+
+try:
+    import keyring
+    import keyring.errors
+except ImportError:  # dependencia opcional, so necessaria para lembrar credenciais
+    keyring = None
+
+
+SERVICO = "Auto-SEI"
+ARQUIVO_CONTAS = os.path.join(os.path.expanduser("~"), ".auto_sei", "contas.json")
+DIRETORIO_PERFIS = os.path.join(os.path.expanduser("~"), ".auto_sei", "perfis")
+
+
+def _arquivo_contas() -> str:
+    return os.getenv("SEI_ARQUIVO_CONTAS", ARQUIVO_CONTAS)
+
+
+def _exigir_keyring():
+    if keyring is None:
+        raise RuntimeError("Instale o pacote 'keyring' para guardar credenciais com seguranca")
+
+
+def listar_contas() -> list:
+    """
+    Usuarios com senha guardada. O arquivo so guarda os nomes; as senhas
+    ficam no cofre do sistema (Windows Credential Manager, Keychain, etc.).
+    """
+    caminho = _arquivo_contas()
+    if not os.path.isfile(caminho):
+        return []
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def _gravar_contas(contas: list):
+    caminho = _arquivo_contas()
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(contas, f, ensure_ascii=False, indent=2)
+
+
+def salvar_credencial(usuario: str, senha: str):
+    _exigir_keyring()
+    keyring.set_password(SERVICO, usuario, senha)
+    contas = listar_contas()
+    if usuario not in contas:
+        _gravar_contas(contas + [usuario])
+
+
+def obter_senha(usuario: str):
+    """Retorna a senha guardada do usuario, ou None se nao houver."""
+    if keyring is None:
+        return None
+    try:
+        return keyring.get_password(SERVICO, usuario)
+    except keyring.errors.KeyringError:
+        # sem backend de cofre disponivel: comporta-se como se nao houvesse senha
+        return None
+
+
+def remover_credencial(usuario: str):
+    _exigir_keyring()
+    try:
+        keyring.delete_password(SERVICO, usuario)
+    except keyring.errors.PasswordDeleteError:
+        pass
+    _gravar_contas([c for c in listar_contas() if c != usuario])
+
+
+def diretorio_perfil(usuario: str) -> str:
+    """Diretorio de perfil do Chrome exclusivo do usuario (cookies, sessao, cache)."""
+    base = os.getenv("SEI_DIRETORIO_PERFIS", DIRETORIO_PERFIS)
+    nome = re.sub(r"[^\w.-]", "_", usuario)
+    caminho = os.path.join(base, nome)
+    os.makedirs(caminho, exist_ok=True)
+    return caminho
@@ -0,0 +1,130 @@
+import os
+import json
+import queue
+import atexit
+import logging
+import itertools
+import threading
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+ARQUIVO_LOG = "sei_automation.log"
+TAMANHO_ARQUIVO_LOG = 5 * 1024 * 1024
+TAMANHO_BUFFER = 2000
+
+# Campos de contexto anexados aos registros via extra=
+CAMPOS_CONTEXTO = ("processo", "indice", "fase")
+
+_lock = threading.Lock()
+_listener = None
+_buffer = None
+
+
+def _contexto(record) -> dict:
+    return {c: getattr(record, c) for c in CAMPOS_CONTEXTO if getattr(record, c, None) is not None}
+
+
+class FormatadorJson(logging.Formatter):
+    """Uma linha JSON por registro, com os campos de contexto quando presentes."""
+
+    def format(self, record):
+        dados = {
+            "hora": self.formatTime(record),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+            **_contexto(record),
+        }
+        if record.exc_info:
+            dados["excecao"] = self.formatException(record.exc_info)
+        return json.dumps(dados, ensure_ascii=False)
+
+
+class FormatadorTexto(logging.Formatter):
+    """Formato legivel para console e painel: hora, nivel, contexto e mensagem."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(contexto)s%(message)s", "%H:%M:%S")
+
+    def format(self, record):
+        contexto = _contexto(record)
+        record.contexto = "[" + " ".join(f"{k}={v}" for k, v in contexto.items()) + "] " if contexto else ""
+        return super().format(record)
+
+
+class QueueHandlerAdiado(QueueHandler):
+    """
+    Enfileira o registro sem formata-lo. O QueueHandler padrao monta a
+    mensagem e o traceback na thread que loga; aqui isso fica para a
+    thread do QueueListener, ja que a fila e local ao processo.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class BufferCircular(logging.Handler):
+    """
+    Guarda as ultimas `tamanho` linhas formatadas, numeradas em sequencia,
+    para o painel de log consultar apenas o que chegou desde a ultima leitura.
+    """
+
+    def __init__(self, tamanho: int = TAMANHO_BUFFER):
+        super().__init__()
+        self._linhas = deque(maxlen=tamanho)
+        self._seq = itertools.count(1)
+
+    def emit(self, record):
+        try:
+            self._linhas.append((next(self._seq), record.levelno, self.format(record)))
+        except Exception:
+            self.handleError(record)
+
+    def novas(self, desde: int = 0) -> list:
+        """Retorna as entradas (seq, nivel, linha) com seq maior que `desde`."""
+        with self.lock:
+            return [e for e in self._linhas if e[0] > desde]
+
+
+class ContextoAdapter(logging.LoggerAdapter):
+    """
+    LoggerAdapter cujo contexto fixo (processo, indice, fase) e mesclado
+    ao extra de cada chamada, em vez de substitui-lo.
+    """
+
+    def process(self, msg, kwargs):
+        kwargs["extra"] = {**self.extra, **kwargs.get("extra", {})}
+        return msg, kwargs
+
+
+def configurar_logging(nivel=logging.INFO) -> BufferCircular:
+    """
+    Direciona o logger raiz para uma fila atendida por um QueueListener,
+    que grava JSON em arquivo, texto no console e no buffer do painel.
+    Pode ser chamada varias vezes; so configura na primeira.
+    """
+    global _listener, _buffer
+    with _lock:
+        if _listener is not None:
+            return _buffer
+
+        arquivo = RotatingFileHandler(
+            os.getenv("SEI_ARQUIVO_LOG", ARQUIVO_LOG),
+            maxBytes=TAMANHO_ARQUIVO_LOG, backupCount=3, encoding="utf-8",
+        )
+        arquivo.setFormatter(FormatadorJson())
+        console = logging.StreamHandler()
+        console.setFormatter(FormatadorTexto())
+        _buffer = BufferCircular()
+        _buffer.setFormatter(FormatadorTexto())
+
+        fila = queue.SimpleQueue()
+        raiz = logging.getLogger()
+        raiz.setLevel(nivel)
+        raiz.addHandler(QueueHandlerAdiado(fila))
+
+        _listener = QueueListener(fila, arquivo, console, _buffer)
+        _listener.start()
+        atexit.register(_listener.stop)
+        return _buffer
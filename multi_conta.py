@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import logging
+import threading
+from functools import partial
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+from scheduler import obter_agendador, PRIORIDADE_NORMAL, PRIORIDADES, JanelaHorario, JobCancelado
+from credenciais import obter_senha, diretorio_perfil
+from pdf_splitter import documentos_divididos, agrupar_resultados, montar_documentos
+
+
+logger = logging.getLogger(__name__)
+
+
+def _novo_resumo() -> dict:
+    return {"lotes": [], "documentos_ok": 0, "documentos_erro": 0, "erros": [], "tempo": 0.0}
+
+
+def carregar_lotes(caminho: str, tipo_padrao: str = "Documentos", prioridade_padrao: str = "normal",
+                   janela_padrao: JanelaHorario = None) -> list:
+    """
+    Le um JSON no formato [{"usuario": "...", "processo": "...", "pasta": "...",
+    "tipo": "...", "prioridade": "normal", "janela": "19-7"}] e monta os lotes
+    de executar_contas, um documento por PDF da pasta. Lotes sem "janela"
+    usam janela_padrao.
+    """
+    with open(caminho, encoding="utf-8") as f:
+        entradas = json.load(f)
+
+    lotes = []
+    for entrada in entradas:
+        pasta = entrada["pasta"]
+        if not os.path.isdir(pasta):
+            raise ValueError(f"Pasta invalida: {pasta}")
+        lotes.append({
+            "usuario": entrada["usuario"],
+            "processo": entrada["processo"],
+            "documentos": montar_documentos(pasta, entrada.get("tipo", tipo_padrao)),
+            "prioridade": PRIORIDADES[entrada.get("prioridade", prioridade_padrao)],
+            "janela": JanelaHorario.de_texto(entrada["janela"]) if entrada.get("janela") else janela_padrao,
+        })
+    return lotes
+
+
+def _sessao_com_perfil(perfil_dir: str):
+    # importado sob demanda, como em scheduler._fabrica_padrao
+    from selenium_handler import SEIAutomation
+    return SEIAutomation(perfil_dir=perfil_dir)
+
+
+def _executar_conta(agendador, usuario: str, lotes: list, dividir: bool, cancelado: threading.Event = None) -> dict:
+    """
+    Executa em sequencia os lotes de uma conta. Lotes da mesma conta nao
+    rodam em paralelo porque compartilham o mesmo perfil do Chrome.
+    """
+    resumo = _novo_resumo()
+    senha = obter_senha(usuario)
+    if not senha:
+        resumo["erros"].append(f"Nenhuma senha guardada para '{usuario}'")
+        resumo["documentos_erro"] = sum(len(lote["documentos"]) for lote in lotes)
+        return resumo
+
+    fabrica = partial(_sessao_com_perfil, diretorio_perfil(usuario))
+    inicio = time.monotonic()
+    for lote in lotes:
+        originais = lote["documentos"]
+        job = None
+        # com divisao, as partes temporarias sao apagadas ao fim de cada lote
+        contexto = documentos_divididos(originais) if dividir else nullcontext(originais)
+        try:
+            if cancelado is not None and cancelado.is_set():
+                raise JobCancelado("Lote cancelado antes de iniciar")
+            with contexto as documentos:
+                job = agendador.submeter(
+                    usuario, senha, lote["processo"], documentos,
+                    prioridade=lote.get("prioridade", PRIORIDADE_NORMAL), janela=lote.get("janela"),
+                    fabrica=fabrica,
+                )
+                resultados = agendador.aguardar(job, cancelado)
+                if dividir:
+                    resultados = agrupar_resultados(documentos, resultados, len(originais))
+        except Exception as e:
+            resultados = []
+            resumo["erros"].append(f"Processo {lote['processo']}: {e}")
+        ok = sum(resultados)
+        resumo["documentos_ok"] += ok
+        resumo["documentos_erro"] += len(originais) - ok
+        resumo["lotes"].append({
+            "processo": lote["processo"],
+            "resultados": resultados,
+            "espera": job.espera if job else 0.0,
+            "execucao": job.execucao if job else 0.0,
+        })
+    resumo["tempo"] = time.monotonic() - inicio
+    return resumo
+
+
+def executar_contas(lotes: list, agendador=None, dividir: bool = False, cancelado: threading.Event = None) -> dict:
+    """
+    Executa lotes de varias contas em paralelo, cada conta com seu proprio
+    perfil do Chrome e senha lida do cofre local (ver credenciais.py).
+    lotes: lista de dicts com 'usuario', 'processo', 'documentos' e,
+    opcionalmente, 'prioridade'.
+    dividir: divide os PDFs acima do limite de upload antes de cada lote.
+    cancelado: opcional; quando sinalizado, os lotes que ainda nao
+    iniciaram sao cancelados e os em execucao seguem ate o fim.
+    Retorna um resumo por usuario; a falha de uma conta fica apenas no
+    resumo dela. A concorrencia total continua limitada pelo agendador.
+    """
+    agendador = agendador or obter_agendador()
+    por_conta = {}
+    for lote in lotes:
+        por_conta.setdefault(lote["usuario"], []).append(lote)
+
+    logger.info("Executando %d lote(s) de %d conta(s)", len(lotes), len(por_conta))
+    resumo = {}
+    with ThreadPoolExecutor(max_workers=len(por_conta) or 1, thread_name_prefix="conta-sei") as pool:
+        futuros = {
+            usuario: pool.submit(_executar_conta, agendador, usuario, lotes_conta, dividir, cancelado)
+            for usuario, lotes_conta in por_conta.items()
+        }
+        for usuario, futuro in futuros.items():
+            try:
+                resumo[usuario] = futuro.result()
+            except Exception as e:
+                logger.exception("Falha na conta %s", usuario)
+                resumo[usuario] = _novo_resumo()
+                resumo[usuario]["erros"].append(str(e))
+                resumo[usuario]["documentos_erro"] = sum(len(l["documentos"]) for l in por_conta[usuario])
+
+    for usuario, r in resumo.items():
+        logger.info(
+            "Conta %s: %d OK, %d erro(s), %d lote(s) em %.1fs",
+            usuario, r["documentos_ok"], r["documentos_erro"], len(r["lotes"]), r["tempo"],
+        )
+    return resumo
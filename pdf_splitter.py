@@ -0,0 +1,159 @@
+import os
+import io
+import math
+import shutil
+import logging
+import tempfile
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # dependencia opcional, so necessaria para dividir arquivos
+    PdfReader = PdfWriter = None
+
+
+# Limite padrao do SEI para documentos externos, sobrescrevivel pelo .env
+LIMITE_UPLOAD_MB = 10
+
+# Margem sobre o limite ao estimar quantas paginas cabem em cada parte
+MARGEM_ESTIMATIVA = 0.9
+
+logger = logging.getLogger(__name__)
+
+
+def limite_upload_bytes() -> int:
+    return int(float(os.getenv("SEI_LIMITE_UPLOAD_MB", LIMITE_UPLOAD_MB)) * 1024 * 1024)
+
+
+def listar_pdfs(pasta: str) -> list:
+    """Nomes dos PDFs da pasta, em ordem alfabetica."""
+    return sorted(f for f in os.listdir(pasta) if f.lower().endswith(".pdf"))
+
+
+def montar_documentos(pasta: str, tipo: str) -> list:
+    """Um documento {'tipo', 'caminho'} por PDF da pasta, no formato de SEIAutomation.executar."""
+    return [{"tipo": tipo, "caminho": os.path.join(pasta, nome)} for nome in listar_pdfs(pasta)]
+
+
+def _gravar_intervalo(reader, inicio: int, fim: int) -> bytes:
+    writer = PdfWriter()
+    for i in range(inicio, fim):
+        writer.add_page(reader.pages[i])
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def _intervalos_dentro_do_limite(reader, inicio: int, fim: int, limite: int) -> list:
+    """
+    Grava as paginas [inicio, fim) e, se o resultado passar do limite,
+    divide o intervalo ao meio ate cada parte caber.
+    """
+    dados = _gravar_intervalo(reader, inicio, fim)
+    if len(dados) <= limite:
+        return [dados]
+    if fim - inicio == 1:
+        raise ValueError(f"A pagina {inicio + 1} sozinha excede o limite de upload")
+    meio = (inicio + fim) // 2
+    return (_intervalos_dentro_do_limite(reader, inicio, meio, limite)
+            + _intervalos_dentro_do_limite(reader, meio, fim, limite))
+
+
+def dividir_arquivo(caminho: str, limite: int, destino: str) -> list:
+    """
+    Divide um PDF em partes sequenciais por faixa de paginas, cada uma
+    abaixo de limite bytes. Retorna os caminhos das partes gravadas em destino.
+    """
+    if PdfReader is None:
+        raise RuntimeError("Instale o pacote 'pypdf' para dividir PDFs grandes")
+
+    reader = PdfReader(caminho)
+    total_paginas = len(reader.pages)
+    estimativa = max(1, math.ceil(os.path.getsize(caminho) / (limite * MARGEM_ESTIMATIVA)))
+    por_parte = max(1, math.ceil(total_paginas / estimativa))
+
+    partes = []
+    for inicio in range(0, total_paginas, por_parte):
+        fim = min(inicio + por_parte, total_paginas)
+        partes.extend(_intervalos_dentro_do_limite(reader, inicio, fim, limite))
+
+    base = os.path.splitext(os.path.basename(caminho))[0]
+    caminhos = []
+    for i, dados in enumerate(partes, 1):
+        # "/" nao e permitido em nomes de arquivo, por isso "parte i de n"
+        parte = os.path.join(destino, f"{base} (parte {i} de {len(partes)}).pdf")
+        with open(parte, "wb") as f:
+            f.write(dados)
+        caminhos.append(parte)
+    return caminhos
+
+
+def dividir_documentos(documentos: list, destino: str, limite: int = None, max_workers: int = None) -> list:
+    """
+    Etapa opcional antes do envio: substitui cada documento acima do limite
+    por suas partes gravadas em destino, mantendo o tipo e a ordem. Cada
+    entrada retornada recebe a chave 'origem' com o indice do documento
+    original. Os arquivos grandes sao divididos em paralelo num pool de
+    processos; um arquivo que nao puder ser dividido segue como uma unica
+    entrada com a chave 'erro', que SEIAutomation.executar marca como falha
+    sem envia-la.
+    Prefira documentos_divididos(), que apaga as partes ao final.
+    """
+    limite = limite or limite_upload_bytes()
+    grandes = [i for i, doc in enumerate(documentos) if os.path.getsize(doc["caminho"]) > limite]
+
+    partes_por_indice = {}
+    erros_por_indice = {}
+    if grandes:
+        logger.info("Dividindo %d arquivo(s) acima de %.1f MB em %s", len(grandes), limite / 1024 / 1024, destino)
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futuros = {
+                i: pool.submit(dividir_arquivo, documentos[i]["caminho"], limite, destino)
+                for i in grandes
+            }
+            for i, futuro in futuros.items():
+                nome = os.path.basename(documentos[i]["caminho"])
+                try:
+                    partes_por_indice[i] = futuro.result()
+                except Exception as e:
+                    erros_por_indice[i] = f"Nao foi possivel dividir {nome}: {e}"
+                    logger.error(erros_por_indice[i])
+                    continue
+                logger.info("%s: %d parte(s)", nome, len(partes_por_indice[i]))
+
+    resultado = []
+    for i, doc in enumerate(documentos):
+        if i in erros_por_indice:
+            resultado.append({**doc, "origem": i, "erro": erros_por_indice[i]})
+            continue
+        for caminho in partes_por_indice.get(i, [doc["caminho"]]):
+            resultado.append({**doc, "caminho": caminho, "origem": i})
+    return resultado
+
+
+@contextmanager
+def documentos_divididos(documentos: list, limite: int = None, max_workers: int = None):
+    """
+    Divide os documentos num diretorio temporario e o apaga ao sair do
+    bloco, depois que o lote terminou de usar as partes.
+    """
+    destino = tempfile.mkdtemp(prefix="sei_partes_")
+    try:
+        yield dividir_documentos(documentos, destino, limite, max_workers)
+    finally:
+        shutil.rmtree(destino, ignore_errors=True)
+
+
+def agrupar_resultados(documentos: list, resultados: list, total: int) -> list:
+    """
+    Converte os resultados por parte em resultados por documento original:
+    um documento so e considerado OK se todas as suas partes foram salvas.
+    """
+    if not resultados:
+        return []
+    agrupados = [True] * total
+    for k, doc in enumerate(documentos):
+        ok = resultados[k] if k < len(resultados) else False
+        agrupados[doc["origem"]] = agrupados[doc["origem"]] and ok
+    return agrupados
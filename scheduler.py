@@ -0,0 +1,479 @@
+import os
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+
+PRIORIDADE_URGENTE = 0
+PRIORIDADE_NORMAL = 5
+PRIORIDADE_LOTE = 10
+
+PRIORIDADES = {
+    "urgente": PRIORIDADE_URGENTE,
+    "normal": PRIORIDADE_NORMAL,
+    "lote": PRIORIDADE_LOTE,
+}
+
+# Valores padrao, sobrescreviveis pelo .env
+TAXA_DOCUMENTOS_MINUTO = 20
+RAJADA_DOCUMENTOS = 5
+MAX_CONCORRENCIA = 2
+
+# Estado compartilhado entre processos (GUI, CLI, outras instancias)
+ARQUIVO_ESTADO = os.path.join(os.path.expanduser("~"), ".auto_sei", "agendador.db")
+# Registro nao renovado por esse tempo (s) pertence a um processo encerrado
+VALIDADE_REGISTRO = 60
+INTERVALO_RENOVACAO = 15
+# Intervalo (s) para reconsultar vagas liberadas por outros processos
+INTERVALO_CONSULTA = 1
+
+
+def _repor_tokens(tokens: float, decorrido: float, taxa: float, capacidade: int) -> float:
+    return min(capacidade, tokens + max(0.0, decorrido) * taxa)
+
+
+class JanelaHorario:
+    """
+    Faixa de horas em que um job pode iniciar. Aceita faixas que
+    atravessam a meia-noite (ex: JanelaHorario(19, 7) = 19h as 7h).
+    """
+
+    def __init__(self, inicio: int, fim: int):
+        if not (0 <= inicio <= 23 and 0 <= fim <= 23):
+            raise ValueError("Horas da janela devem estar entre 0 e 23")
+        self.inicio = inicio
+        self.fim = fim
+
+    @classmethod
+    def de_texto(cls, texto: str):
+        """Converte '19-7' em JanelaHorario(19, 7)."""
+        try:
+            inicio, fim = (int(p) for p in texto.split("-"))
+        except ValueError:
+            raise ValueError(f"Janela invalida: '{texto}'. Use o formato HH-HH (ex: 19-7)")
+        return cls(inicio, fim)
+
+    def permite(self, agora: datetime = None) -> bool:
+        hora = (agora or datetime.now()).hour
+        if self.inicio == self.fim:
+            return True
+        if self.inicio < self.fim:
+            return self.inicio <= hora < self.fim
+        return hora >= self.inicio or hora < self.fim
+
+    def segundos_ate_abrir(self, agora: datetime = None) -> float:
+        agora = agora or datetime.now()
+        if self.permite(agora):
+            return 0.0
+        abertura = agora.replace(hour=self.inicio, minute=0, second=0, microsecond=0)
+        if abertura <= agora:
+            abertura += timedelta(days=1)
+        return (abertura - agora).total_seconds()
+
+    def __str__(self):
+        return f"{self.inicio}h-{self.fim}h"
+
+
+class EstadoCompartilhado:
+    """
+    Fila global, vagas de execucao e tokens do limitador guardados num
+    SQLite local, para que todos os processos respeitem os mesmos limites.
+    Cada operacao roda numa transacao BEGIN IMMEDIATE, que serializa os
+    processos. Registros sem renovacao ha VALIDADE_REGISTRO segundos sao
+    descartados, liberando vagas de processos encerrados ou travados.
+    """
+
+    def __init__(self, caminho: str = None):
+        self.caminho = caminho or os.getenv("SEI_ARQUIVO_AGENDADOR", ARQUIVO_ESTADO)
+        os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+        with self._transacao() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, prioridade INTEGER NOT NULL,"
+                " janela_inicio INTEGER, janela_fim INTEGER,"
+                " ativo INTEGER NOT NULL DEFAULT 0, expira REAL NOT NULL)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS bucket ("
+                " id INTEGER PRIMARY KEY CHECK (id = 1), tokens REAL NOT NULL, ultimo REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _transacao(self):
+        db = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        finally:
+            db.close()
+
+    def registrar(self, prioridade: int, janela) -> int:
+        """Insere um job pendente na fila global e retorna seu id (ordem de chegada)."""
+        with self._transacao() as db:
+            cur = db.execute(
+                "INSERT INTO jobs (prioridade, janela_inicio, janela_fim, expira) VALUES (?, ?, ?, ?)",
+                (prioridade, janela.inicio if janela else None, janela.fim if janela else None,
+                 time.time() + VALIDADE_REGISTRO),
+            )
+            return cur.lastrowid
+
+    def ocupar_vaga(self, job_id: int, prioridade: int, maximo: int) -> bool:
+        """
+        Marca o job como ativo se houver vaga e nenhum job pendente elegivel,
+        de qualquer processo, estiver a frente dele na fila global.
+        """
+        agora = datetime.now()
+        with self._transacao() as db:
+            db.execute("DELETE FROM jobs WHERE expira < ?", (time.time(),))
+            ativos = db.execute("SELECT COUNT(*) FROM jobs WHERE ativo = 1").fetchone()[0]
+            if ativos >= maximo:
+                return False
+            a_frente = db.execute(
+                "SELECT janela_inicio, janela_fim FROM jobs WHERE ativo = 0"
+                " AND (prioridade < ? OR (prioridade = ? AND id < ?))",
+                (prioridade, prioridade, job_id),
+            ).fetchall()
+            for inicio, fim in a_frente:
+                if inicio is None or JanelaHorario(inicio, fim).permite(agora):
+                    return False
+            return db.execute("UPDATE jobs SET ativo = 1 WHERE id = ?", (job_id,)).rowcount == 1
+
+    def renovar(self, ids):
+        if not ids:
+            return
+        with self._transacao() as db:
+            db.executemany(
+                "UPDATE jobs SET expira = ? WHERE id = ?",
+                [(time.time() + VALIDADE_REGISTRO, i) for i in ids],
+            )
+
+    def liberar(self, job_id: int):
+        with self._transacao() as db:
+            db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def consumir_tokens(self, taxa: float, capacidade: int, n: int = 1) -> float:
+        """
+        Tenta retirar n tokens do balde compartilhado. Retorna 0 em caso de
+        sucesso ou o tempo (s) estimado ate haver tokens suficientes.
+        """
+        with self._transacao() as db:
+            agora = time.time()
+            linha = db.execute("SELECT tokens, ultimo FROM bucket WHERE id = 1").fetchone()
+            tokens = _repor_tokens(linha[0], agora - linha[1], taxa, capacidade) if linha else float(capacidade)
+            falta = 0.0
+            if tokens >= n:
+                tokens -= n
+            else:
+                falta = (n - tokens) / taxa
+            db.execute("INSERT OR REPLACE INTO bucket (id, tokens, ultimo) VALUES (1, ?, ?)", (tokens, agora))
+            return falta
+
+
+class TokenBucketCompartilhado:
+    """
+    Limitador de taxa (token bucket) cujo saldo fica no EstadoCompartilhado,
+    valendo para todos os processos.
+    taxa: tokens repostos por segundo.
+    capacidade: quantidade maxima de tokens acumulados (tamanho da rajada).
+    """
+
+    def __init__(self, estado: EstadoCompartilhado, taxa: float, capacidade: int):
+        if taxa <= 0 or capacidade < 1:
+            raise ValueError("Taxa e capacidade do limitador devem ser positivas")
+        self.estado = estado
+        self.taxa = taxa
+        self.capacidade = capacidade
+
+    def adquirir(self, n: int = 1) -> float:
+        """Bloqueia ate haver n tokens disponiveis. Retorna o tempo aguardado em segundos."""
+        inicio = time.monotonic()
+        while True:
+            falta = self.estado.consumir_tokens(self.taxa, self.capacidade, n)
+            if falta == 0:
+                return time.monotonic() - inicio
+            time.sleep(falta)
+
+
+class JobCancelado(RuntimeError):
+    """Job retirado da fila antes de iniciar."""
+
+
+class Job:
+    """Lote de documentos de um processo aguardando ou em execucao no agendador."""
+
+    def __init__(self, seq, usuario, senha, processo, documentos, prioridade, janela, fabrica=None):
+        self.seq = seq
+        self.usuario = usuario
+        self.senha = senha
+        self.processo = processo
+        self.documentos = documentos
+        self.prioridade = prioridade
+        self.janela = janela
+        self.fabrica = fabrica
+        self.criado_em = time.monotonic()
+        self.iniciado_em = None
+        self.finalizado_em = None
+        self.resultados = []
+        self.erro = None
+        self._concluido = threading.Event()
+
+    @property
+    def espera(self) -> float:
+        """Tempo (s) que o job ficou na fila ate iniciar."""
+        fim = self.iniciado_em if self.iniciado_em is not None else time.monotonic()
+        return fim - self.criado_em
+
+    @property
+    def execucao(self) -> float:
+        """Tempo (s) de execucao do job, do inicio ao fim."""
+        if self.iniciado_em is None:
+            return 0.0
+        fim = self.finalizado_em if self.finalizado_em is not None else time.monotonic()
+        return fim - self.iniciado_em
+
+    def concluido(self, timeout: float = None) -> bool:
+        """Indica se o job terminou, aguardando ate timeout segundos se informado."""
+        if timeout:
+            return self._concluido.wait(timeout)
+        return self._concluido.is_set()
+
+    def aguardar(self, timeout: float = None) -> list:
+        """
+        Aguarda o fim do job e retorna a lista de resultados por documento.
+        Repassa a excecao caso a automacao tenha falhado como um todo.
+        """
+        if not self._concluido.wait(timeout):
+            raise TimeoutError(f"Job #{self.seq} ainda nao concluido")
+        if self.erro is not None:
+            raise self.erro
+        return self.resultados
+
+    def _chave(self):
+        return (self.prioridade, self.seq)
+
+
+def _fabrica_padrao():
+    # importado sob demanda: o agendador em si nao depende do Selenium
+    from selenium_handler import SEIAutomation
+    return SEIAutomation()
+
+
+class Agendador:
+    """
+    Fila de lotes na frente de SEIAutomation.executar.
+
+    A fila, o limite de sessoes simultaneas e o token bucket (documentos
+    por minuto) ficam no EstadoCompartilhado, valendo para todos os
+    processos que usam o mesmo arquivo. Jobs com janela de horario so
+    iniciam dentro dela; entre os elegiveis, vence a menor prioridade
+    e, em empate, o mais antigo, mesmo que de outro processo.
+    """
+
+    def __init__(self, taxa_por_minuto=None, rajada=None, max_concorrencia=None, fabrica=None,
+                 estado: EstadoCompartilhado = None):
+        taxa_por_minuto = taxa_por_minuto or float(os.getenv("SEI_TAXA_DOCUMENTOS_MINUTO", TAXA_DOCUMENTOS_MINUTO))
+        rajada = rajada or int(os.getenv("SEI_RAJADA_DOCUMENTOS", RAJADA_DOCUMENTOS))
+        self.max_concorrencia = max_concorrencia or int(os.getenv("SEI_MAX_CONCORRENCIA", MAX_CONCORRENCIA))
+        if self.max_concorrencia < 1:
+            raise ValueError("Concorrencia maxima deve ser ao menos 1")
+
+        self.estado = estado or EstadoCompartilhado()
+        self.limitador = TokenBucketCompartilhado(self.estado, taxa_por_minuto / 60.0, rajada)
+        self.fabrica = fabrica or _fabrica_padrao
+        self.logger = logging.getLogger(__name__)
+
+        self._pendentes = []
+        self._ativos = set()
+        self._cond = threading.Condition()
+        self._novidade = False
+        self._rodando = True
+        self._despachante = threading.Thread(target=self._despachar, name="agendador-sei", daemon=True)
+        self._despachante.start()
+        threading.Thread(target=self._renovar, name="agendador-sei-renovacao", daemon=True).start()
+
+    def submeter(self, usuario, senha, processo, documentos: list,
+                 prioridade: int = PRIORIDADE_NORMAL, janela: JanelaHorario = None, fabrica=None) -> Job:
+        """
+        Enfileira um lote e retorna o Job correspondente sem bloquear.
+        fabrica: opcional, substitui a fabrica do agendador para este job
+        (ex: SEIAutomation com perfil de Chrome proprio).
+        """
+        if not self._rodando:
+            raise RuntimeError("Agendador encerrado")
+        # fora do lock: o SQLite pode esperar ate 30s por outro processo
+        seq = self.estado.registrar(prioridade, janela)
+        job = Job(seq, usuario, senha, processo, documentos, prioridade, janela, fabrica)
+        with self._cond:
+            encerrado = not self._rodando
+            if not encerrado:
+                self._pendentes.append(job)
+                self._avisar()
+        if encerrado:
+            self._liberar(job.seq)
+            raise RuntimeError("Agendador encerrado")
+        self.logger.info(
+            "Job #%d enfileirado: processo %s, %d documento(s), prioridade %d, janela %s",
+            job.seq, processo, len(documentos), prioridade, janela or "qualquer hora",
+        )
+        return job
+
+    def pendentes(self) -> int:
+        with self._cond:
+            return len(self._pendentes)
+
+    def encerrar(self):
+        """Para de despachar novos jobs. Jobs em execucao seguem ate o fim."""
+        with self._cond:
+            self._rodando = False
+            cancelados = list(self._pendentes)
+            self._pendentes.clear()
+            self._avisar()
+        for job in cancelados:
+            self._liberar(job.seq)
+            job.erro = JobCancelado(f"Job #{job.seq} cancelado: agendador encerrado")
+            job._concluido.set()
+
+    def cancelar(self, job: Job) -> bool:
+        """
+        Retira da fila um job que ainda nao iniciou; job.aguardar() passa a
+        levantar JobCancelado. Retorna False se o job ja iniciou ou terminou:
+        uma sessao do navegador em andamento nao e interrompida.
+        """
+        with self._cond:
+            if job not in self._pendentes:
+                return False
+            self._pendentes.remove(job)
+            self._avisar()
+        self._liberar(job.seq)
+        job.erro = JobCancelado(f"Job #{job.seq} cancelado antes de iniciar")
+        job._concluido.set()
+        self.logger.info("Job #%d cancelado antes de iniciar", job.seq)
+        return True
+
+    def aguardar(self, job: Job, cancelado: threading.Event = None) -> list:
+        """
+        Como job.aguardar(), mas cancela o job se o evento `cancelado` for
+        sinalizado enquanto ele ainda esta na fila. Se ele ja tiver iniciado,
+        aguarda o fim normalmente.
+        """
+        if cancelado is not None:
+            while not job.concluido(INTERVALO_CONSULTA):
+                if cancelado.is_set():
+                    if not self.cancelar(job):
+                        self.logger.info("Job #%d ja iniciado; segue ate o fim", job.seq)
+                    break
+        return job.aguardar()
+
+    def _avisar(self):
+        """Acorda o despachante. Chamar com self._cond adquirido."""
+        self._novidade = True
+        self._cond.notify_all()
+
+    def _liberar(self, job_id: int):
+        try:
+            self.estado.liberar(job_id)
+        except sqlite3.Error as e:
+            # o registro expira sozinho apos VALIDADE_REGISTRO sem renovacao
+            self.logger.error("Falha ao liberar o job #%d no estado compartilhado: %s", job_id, e)
+
+    def _proximo_elegivel(self):
+        agora = datetime.now()
+        elegiveis = [j for j in self._pendentes if j.janela is None or j.janela.permite(agora)]
+        if not elegiveis:
+            espera = min(j.janela.segundos_ate_abrir(agora) for j in self._pendentes) if self._pendentes else None
+            return None, espera
+        return min(elegiveis, key=Job._chave), None
+
+    def _despachar(self):
+        while True:
+            with self._cond:
+                while self._rodando and not self._pendentes:
+                    self._cond.wait()
+                if not self._rodando:
+                    return
+                self._novidade = False
+                job, espera = self._proximo_elegivel()
+
+            # a consulta ao SQLite fica fora do lock para nao travar submeter e _renovar
+            if job is not None:
+                try:
+                    ocupou = self.estado.ocupar_vaga(job.seq, job.prioridade, self.max_concorrencia)
+                except sqlite3.Error as e:
+                    self.logger.warning("Falha ao consultar vagas no estado compartilhado: %s", e)
+                    ocupou = False
+                if ocupou:
+                    self._iniciar(job)
+                    continue
+                # sem vaga, com job de outro processo a frente ou erro: reconsulta em breve
+                espera = INTERVALO_CONSULTA
+
+            with self._cond:
+                # Reavalia periodicamente para nao depender do relogio exato
+                if self._rodando and not self._novidade:
+                    self._cond.wait(min(espera, 60))
+
+    def _iniciar(self, job: Job):
+        with self._cond:
+            if job not in self._pendentes:
+                # cancelado enquanto a vaga era ocupada; a vaga ja foi liberada
+                return
+            self._pendentes.remove(job)
+            self._ativos.add(job.seq)
+        threading.Thread(target=self._executar, args=(job,), name=f"job-sei-{job.seq}", daemon=True).start()
+
+    def _executar(self, job: Job):
+        job.iniciado_em = time.monotonic()
+        self.logger.info("Job #%d iniciado apos %.1fs na fila", job.seq, job.espera)
+        try:
+            auto = (job.fabrica or self.fabrica)()
+            job.resultados = auto.executar(
+                job.usuario, job.senha, job.processo, job.documentos, limitador=self.limitador
+            )
+        except Exception as e:
+            job.erro = e
+        finally:
+            job.finalizado_em = time.monotonic()
+            self.logger.info(
+                "Job #%d finalizado: espera %.1fs, execucao %.1fs, %d/%d documento(s) OK",
+                job.seq, job.espera, job.execucao, sum(job.resultados), len(job.documentos),
+            )
+            self._liberar(job.seq)
+            with self._cond:
+                self._ativos.discard(job.seq)
+                self._avisar()
+            job._concluido.set()
+
+    def _renovar(self):
+        """Mantem vivos no estado compartilhado os jobs pendentes e ativos deste processo."""
+        while True:
+            time.sleep(INTERVALO_RENOVACAO)
+            with self._cond:
+                ids = [j.seq for j in self._pendentes] + list(self._ativos)
+            try:
+                self.estado.renovar(ids)
+            except sqlite3.Error as e:
+                self.logger.warning("Falha ao renovar jobs no estado compartilhado: %s", e)
+
+
+_agendador = None
+_agendador_lock = threading.Lock()
+
+
+def obter_agendador() -> Agendador:
+    """
+    Retorna o agendador do processo. Os limites e a fila valem entre
+    processos pelo EstadoCompartilhado (SEI_ARQUIVO_AGENDADOR).
+    """
+    global _agendador
+    with _agendador_lock:
+        if _agendador is None:
+            _agendador = Agendador()
+        return _agendador
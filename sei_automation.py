@@ -1,14 +1,22 @@
 import os
 import sys
+import logging
+import threading
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLineEdit, QPushButton, QMessageBox, QFileDialog, QCheckBox,
     QLabel, QComboBox, QScrollArea, QFrame, QSizePolicy, QCompleter,
+    QPlainTextEdit,
 )
 from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt
-from dotenv import load_dotenv, set_key
-from selenium_handler import SEIAutomation
+from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
+from dotenv import load_dotenv
+from scheduler import obter_agendador, PRIORIDADES, JanelaHorario, JobCancelado
+from pdf_splitter import documentos_divididos, agrupar_resultados, limite_upload_bytes, listar_pdfs
+from classificador import obter_classificador
+from log_config import configurar_logging, TAMANHO_BUFFER
+from credenciais import listar_contas, obter_senha, salvar_credencial, remover_credencial
+from multi_conta import carregar_lotes, executar_contas
 
 
 TIPOS_DOCUMENTO = [
@@ -22,15 +30,17 @@ TIPOS_DOCUMENTO = [
     "Outros",
 ]
 
+# opção do seletor de janela que deixa o lote iniciar a qualquer hora
+SEM_JANELA = "Qualquer horário"
+
 STYLE_INPUT = "background-color: #ffffff; color: black; border-radius: 5px; padding: 6px; font-size: 13px;"  
+STYLE_ROW = "background-color: #e9eef4; border-radius: 5px;"
+STYLE_ROW_REVISAR = "background-color: #fff3cd; border-radius: 5px;"
 
 class DocumentoRow(QFrame):
-    def __init__(self, numero, nome_arquivo: str, on_remove):
+    def __init__(self, numero, nome_arquivo: str, on_remove, tipo: str = None):
         super().__init__()
-        self.setStyleSheet("""
-            background-color: #e9eef4;
-            border-radius: 5px;
-        """)
+        self.setStyleSheet(STYLE_ROW)
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
 
         row = QHBoxLayout(self)
@@ -57,7 +67,11 @@ class DocumentoRow(QFrame):
         completer_tipo.setCaseSensitivity(Qt.CaseInsensitive)
         completer_tipo.setFilterMode(Qt.MatchContains)
         self.combo_tipo.setCompleter(completer_tipo)
+        if tipo:
+            self.combo_tipo.setCurrentText(tipo)
+        self.combo_tipo.currentTextChanged.connect(lambda _: self.marcar_revisao(False))
         row.addWidget(self.combo_tipo)
+        self.revisar = False
 
         self.entry_nome = QLineEdit()
         self.entry_nome.setText(nome_arquivo)
@@ -83,24 +97,131 @@ class DocumentoRow(QFrame):
     def dados(self):
         return self.combo_tipo.currentText().strip(), self.entry_nome.text().strip()
 
+    def marcar_revisao(self, pendente: bool):
+        """Destaca a linha cujo tipo não foi reconhecido pelas regras de classificação."""
+        self.revisar = pendente
+        self.setStyleSheet(STYLE_ROW_REVISAR if pendente else STYLE_ROW)
+        self.combo_tipo.setToolTip("Tipo não reconhecido automaticamente, revise" if pendente else "")
+
     def set_status(self, status: str, cor: str = "#333"):
         self.lbl_status.setText(status)
         self.lbl_status.setStyleSheet(f"font-size: 11px; font-weight: bold; color: {cor};")
 
 
+class ExecucaoThread(QThread):
+    """
+    Divide os PDFs grandes (se pedido), submete o lote ao agendador e
+    aguarda o resultado fora da thread da interface.
+    """
+
+    # job, resultados por documento da interface, excecao (ou None)
+    finalizado = pyqtSignal(object, object, object)
+
+    def __init__(self, usuario, senha, processo, documentos, prioridade, janela, dividir):
+        super().__init__()
+        self.usuario = usuario
+        self.senha = senha
+        self.processo = processo
+        self.documentos = documentos
+        self.prioridade = prioridade
+        self.janela = janela
+        self.dividir = dividir
+        self.job = None
+        # sinalizado pelo botão Cancelar; só retira o lote enquanto ele aguarda na fila
+        self.cancelado = threading.Event()
+
+    def _executar(self, documentos):
+        if self.cancelado.is_set():
+            raise JobCancelado("Lote cancelado antes de iniciar")
+        agendador = obter_agendador()
+        self.job = agendador.submeter(
+            self.usuario, self.senha, self.processo, documentos,
+            prioridade=self.prioridade, janela=self.janela,
+        )
+        return agendador.aguardar(self.job, self.cancelado)
+
+    def run(self):
+        try:
+            if self.dividir:
+                # as partes temporárias são apagadas quando o lote termina
+                with documentos_divididos(self.documentos) as partes:
+                    resultados = agrupar_resultados(partes, self._executar(partes), len(self.documentos))
+            else:
+                resultados = self._executar(self.documentos)
+            self.finalizado.emit(self.job, resultados, None)
+        except Exception as e:
+            self.finalizado.emit(self.job, [], e)
+
+
+class ClassificacaoTextoThread(QThread):
+    """
+    Lê a primeira página dos PDFs não reconhecidos pelo nome e tenta
+    classificá-los pelo texto, fora da thread da interface.
+    """
+
+    # linha (DocumentoRow), tipo encontrado
+    classificado = pyqtSignal(object, str)
+    # quantidade de linhas que seguem sem tipo
+    finalizado = pyqtSignal(int)
+
+    def __init__(self, classificador, pendentes):
+        super().__init__()
+        self.classificador = classificador
+        # lista de (linha, caminho do PDF)
+        self.pendentes = pendentes
+        self.interrompido = threading.Event()
+
+    def run(self):
+        restantes = 0
+        for linha, caminho in self.pendentes:
+            if self.interrompido.is_set():
+                return
+            tipo = self.classificador.classificar_texto(caminho)
+            if tipo is None:
+                restantes += 1
+            else:
+                self.classificado.emit(linha, tipo)
+        self.finalizado.emit(restantes)
+
+
+class LotesThread(QThread):
+    """Executa em paralelo lotes de várias contas (ver multi_conta.py) fora da thread da interface."""
+
+    # resumo por usuário, excecao (ou None)
+    finalizado = pyqtSignal(object, object)
+
+    def __init__(self, caminho_lotes, janela, dividir):
+        super().__init__()
+        self.caminho_lotes = caminho_lotes
+        self.janela = janela
+        self.dividir = dividir
+        self.cancelado = threading.Event()
+
+    def run(self):
+        try:
+            lotes = carregar_lotes(self.caminho_lotes, janela_padrao=self.janela)
+            self.finalizado.emit(executar_contas(lotes, dividir=self.dividir, cancelado=self.cancelado), None)
+        except Exception as e:
+            self.finalizado.emit({}, e)
+
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Autobot")
-        self.setGeometry(100, 100, 680, 560)
-        self.setFixedSize(680, 560)
+        self.setGeometry(100, 100, 680, 700)
+        self.setFixedSize(680, 700)
         self.setWindowIcon(QIcon("Icon.ico"))
         self.setStyleSheet("background-color: #dfdfdf;")
 
         load_dotenv()
+        self._log_buffer = configurar_logging()
+        self._log_seq = 0
 
         self._linhas = []
         self._contador = 0
+        self._execucao = None
+        self._classificacao = None
 
         central = QWidget()
         self.setCentralWidget(central)
@@ -228,7 +349,43 @@ class MainWindow(QMainWindow):
         btns_layout.addSpacing(8)
         btns_layout.addWidget(btn_reset)
         btns_layout.addStretch()
+
+        self.combo_prioridade = QComboBox()
+        self.combo_prioridade.addItems(list(PRIORIDADES))
+        self.combo_prioridade.setCurrentText("normal")
+        self.combo_prioridade.setToolTip("Prioridade do lote na fila do agendador")
+        self.combo_prioridade.setFixedSize(110, 38)
+        self.combo_prioridade.setStyleSheet(
+            "QComboBox { background-color: #fff; color: black; font-size: 12px;"
+            "  border-radius: 5px; padding: 2px 6px; }"
+            "QComboBox QAbstractItemView { background: #fff; color: black; }"
+        )
+        btns_layout.addWidget(self.combo_prioridade)
         layout.addLayout(btns_layout)
+
+        self.checkbox_dividir = QCheckBox(
+            f"Dividir PDFs acima de {limite_upload_bytes() / 1024 / 1024:.0f} MB em partes antes do envio"
+        )
+        self.checkbox_dividir.setStyleSheet("font-size: 12px; color: black;")
+
+        # credenciais ficam no cofre do sistema, não no .env
+        self.checkbox_salvar = QCheckBox("Lembrar usuário e senha")
+        self.checkbox_salvar.setStyleSheet("font-size: 12px; color: black;")
+        self.checkbox_salvar.clicked.connect(self._alternar_lembrar)
+
+        # lotes de várias contas, com senhas do cofre e perfis de Chrome separados
+        btn_lotes = QPushButton("Lotes de várias contas...")
+        btn_lotes.setFixedHeight(26)
+        btn_lotes.setStyleSheet("background-color: #9ea4aa; color: white; border-radius: 5px; padding: 0 8px;")
+        btn_lotes.clicked.connect(self.executar_lotes)
+
+        opcoes_layout = QHBoxLayout()
+        opcoes_layout.addWidget(self.checkbox_dividir)
+        opcoes_layout.addStretch()
+        opcoes_layout.addWidget(self.checkbox_salvar)
+        opcoes_layout.addSpacing(8)
+        opcoes_layout.addWidget(btn_lotes)
+        layout.addLayout(opcoes_layout)
         btn_buscar.setFixedSize(160, 38)
         btn_add.setFixedSize(210, 38)
         btn_reset.setFixedSize(120, 38)
@@ -239,13 +396,96 @@ class MainWindow(QMainWindow):
             "background-color: #0e509a; color: white; border-radius: 6px; font-size: 14px; font-weight: bold;"
         )
         btn_exec.clicked.connect(self.executar_automacao)
-        layout.addWidget(btn_exec)
 
-        #self.checkbox_salvar = QCheckBox("Lembrar usuário e senha")
-        # checkbox disponível para permitir persistência de credenciais
-        #self.checkbox_salvar.setVisible(True)
+        # faixa de horas em que o lote pode iniciar, ex: 19-7 para rodar à noite
+        self.combo_janela = QComboBox()
+        self.combo_janela.setEditable(True)
+        self.combo_janela.addItems([SEM_JANELA, "19-7", "22-6"])
+        self.combo_janela.setToolTip("Horário em que o lote pode iniciar (ex: 19-7 = das 19h às 7h)")
+        self.combo_janela.setFixedSize(140, 38)
+        self.combo_janela.setStyleSheet(
+            "QComboBox { background-color: #fff; color: black; font-size: 12px;"
+            "  border-radius: 5px; padding: 2px 6px; }"
+            "QComboBox QAbstractItemView { background: #fff; color: black; }"
+        )
+
+        self.btn_cancelar = QPushButton("Cancelar")
+        self.btn_cancelar.setFixedSize(110, 38)
+        self.btn_cancelar.setToolTip("Retira da fila os lotes que ainda não iniciaram")
+        self.btn_cancelar.setStyleSheet("background-color: #b22222; color: white; border-radius: 6px;")
+        self.btn_cancelar.setEnabled(False)
+        self.btn_cancelar.clicked.connect(self._cancelar_execucao)
+
+        exec_layout = QHBoxLayout()
+        exec_layout.addWidget(self.combo_janela)
+        exec_layout.addWidget(btn_exec, 1)
+        exec_layout.addWidget(self.btn_cancelar)
+        layout.addLayout(exec_layout)
+
+        # controles travados enquanto um lote está em execução
+        self._controles_formulario = [
+            self.usuario_input, self.senha_input, self.processo_input, self.pasta_input,
+            btn_pasta, self.scroll_area, btn_buscar, btn_add, btn_reset,
+            self.combo_prioridade, self.checkbox_dividir, self.checkbox_salvar, btn_lotes,
+            self.combo_janela, btn_exec,
+        ]
+
+        # painel de log ao vivo, alimentado pelo buffer circular do logging
+        self.log_painel = QPlainTextEdit()
+        self.log_painel.setReadOnly(True)
+        self.log_painel.setMaximumBlockCount(TAMANHO_BUFFER)
+        self.log_painel.setFixedHeight(130)
+        self.log_painel.setStyleSheet(
+            "background-color: #1e1e1e; color: #d4d4d4; border-radius: 4px;"
+            "font-family: Consolas, monospace; font-size: 11px;"
+        )
+        layout.addWidget(self.log_painel)
+
+        self._log_timer = QTimer(self)
+        self._log_timer.timeout.connect(self._atualizar_log)
+        self._log_timer.start(300)
+
+        self._carregar_login_salvo()
 
-        #self._carregar_login_salvo()
+    def _atualizar_log(self):
+        novas = self._log_buffer.novas(self._log_seq)
+        if not novas:
+            return
+        self._log_seq = novas[-1][0]
+        self.log_painel.appendPlainText("\n".join(linha for _, _, linha in novas))
+
+    def _bloquear_formulario(self, bloquear: bool):
+        for controle in self._controles_formulario:
+            controle.setEnabled(not bloquear)
+        # o cancelamento só faz sentido enquanto há lote em andamento
+        self.btn_cancelar.setEnabled(bloquear)
+        self.btn_cancelar.setText("Cancelar")
+
+    def _cancelar_execucao(self):
+        """Pede o cancelamento dos lotes que ainda aguardam na fila do agendador."""
+        if self._execucao is None or not self._execucao.isRunning():
+            return
+        self._execucao.cancelado.set()
+        self.btn_cancelar.setEnabled(False)
+        self.btn_cancelar.setText("Cancelando...")
+
+    def _janela_selecionada(self):
+        """JanelaHorario escolhida no formulário, ou None para iniciar a qualquer hora."""
+        texto = self.combo_janela.currentText().strip()
+        if not texto or texto == SEM_JANELA:
+            return None
+        return JanelaHorario.de_texto(texto)
+
+    def closeEvent(self, event):
+        if self._execucao is not None and self._execucao.isRunning():
+            QMessageBox.warning(
+                self, "Aguarde",
+                "Há um lote em execução. Cancele os lotes na fila ou aguarde a conclusão para fechar."
+            )
+            event.ignore()
+            return
+        self._interromper_classificacao()
+        super().closeEvent(event)
 
     def _input(self, placeholder, password=False):
         f = QLineEdit()
@@ -256,13 +496,34 @@ class MainWindow(QMainWindow):
             f.setEchoMode(QLineEdit.Password)
         return f
 
-    # def _carregar_login_salvo(self):
-        #usuario = os.getenv("SEI_USUARIO")
-        #senha = os.getenv("SEI_SENHA")
-        #if usuario and senha:
-            #self.usuario_input.setText(usuario)
-            #self.senha_input.setText(senha)
-            #self.checkbox_salvar.setChecked(True)
+    def _carregar_login_salvo(self):
+        contas = listar_contas()
+        completer_usuario = QCompleter(contas, self.usuario_input)
+        completer_usuario.setCaseSensitivity(Qt.CaseInsensitive)
+        self.usuario_input.setCompleter(completer_usuario)
+        self.usuario_input.editingFinished.connect(self._preencher_senha_salva)
+
+        usuario = os.getenv("SEI_USUARIO") or (contas[0] if contas else "")
+        if usuario:
+            self.usuario_input.setText(usuario)
+            self._preencher_senha_salva()
+
+    def _preencher_senha_salva(self):
+        senha = obter_senha(self.usuario_input.text().strip())
+        # sem senha guardada para este usuário, não reaproveita a do anterior
+        self.senha_input.setText(senha or "")
+        self.checkbox_salvar.setChecked(bool(senha))
+
+    def _alternar_lembrar(self, marcado: bool):
+        """Ao desmarcar, esquece a credencial guardada do usuário informado."""
+        usuario = self.usuario_input.text().strip()
+        if marcado or not usuario or not obter_senha(usuario):
+            return
+        try:
+            remover_credencial(usuario)
+            self.usuario_input.completer().model().setStringList(listar_contas())
+        except Exception as e:
+            logging.getLogger(__name__).warning("Não foi possível remover a credencial: %s", e)
 
     def _selecionar_pasta(self):
         pasta = QFileDialog.getExistingDirectory(self, "Selecionar Pasta")
@@ -275,18 +536,54 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Erro", "Selecione uma pasta valida.")
             return
 
-        pdfs = sorted([f for f in os.listdir(pasta) if f.lower().endswith(".pdf")])
+        pdfs = listar_pdfs(pasta)
         if not pdfs:
             QMessageBox.information(self, "Aviso", "Nenhum PDF encontrado.")
             return
 
+        classificador = obter_classificador()
+        pendentes = []
+
         self.limpar_linhas()
         for nome in pdfs:
             self._contador += 1
-            linha = DocumentoRow(self._contador, nome, self._remover_linha)
+            # aqui só pelo nome; o texto do PDF, se ativado, é lido em outra thread
+            tipo = classificador.classificar(nome)
+            linha = DocumentoRow(self._contador, nome, self._remover_linha, tipo)
+            if tipo is None:
+                linha.marcar_revisao(True)
+                pendentes.append((linha, os.path.join(pasta, nome)))
             self.linhas_layout.insertWidget(self.linhas_layout.count() - 1, linha)
             self._linhas.append(linha)
 
+        if pendentes and classificador.usar_texto:
+            self._classificacao = ClassificacaoTextoThread(classificador, pendentes)
+            self._classificacao.classificado.connect(self._tipo_pelo_texto)
+            self._classificacao.finalizado.connect(lambda restantes: self._avisar_revisao(restantes, len(pdfs)))
+            self._classificacao.start()
+        elif pendentes:
+            self._avisar_revisao(len(pendentes), len(pdfs))
+
+    def _tipo_pelo_texto(self, linha, tipo):
+        # ignora linhas removidas ou já revisadas enquanto o texto era lido
+        if linha in self._linhas and linha.revisar:
+            linha.combo_tipo.setCurrentText(tipo)
+            linha.marcar_revisao(False)
+
+    def _avisar_revisao(self, nao_classificados, total):
+        if nao_classificados:
+            QMessageBox.information(
+                self, "Revisão",
+                f"{nao_classificados} de {total} arquivo(s) sem tipo reconhecido. "
+                "Revise as linhas destacadas em amarelo."
+            )
+
+    def _interromper_classificacao(self):
+        if self._classificacao is not None and self._classificacao.isRunning():
+            self._classificacao.interrompido.set()
+            # aguarda só o arquivo em leitura terminar
+            self._classificacao.wait()
+
     def _adicionar_linha_vazia(self):
         self._contador += 1
         linha = DocumentoRow(self._contador, "", self._remover_linha)
@@ -298,6 +595,7 @@ class MainWindow(QMainWindow):
         linha.deleteLater()
 
     def limpar_linhas(self):
+        self._interromper_classificacao()
         for linha in self._linhas:
             linha.deleteLater()
         self._linhas.clear()
@@ -340,32 +638,76 @@ class MainWindow(QMainWindow):
                 return
             documentos.append({"tipo": tipo, "caminho": caminho})
 
+        try:
+            janela = self._janela_selecionada()
+        except ValueError as e:
+            QMessageBox.warning(self, "Erro", str(e))
+            return
+
         # salva credenciais se necessário
-        #if self.checkbox_salvar.isChecked():
-            #try:
-                # grava no .env atual ou cria um
-                #set_key(dotenv_path=".env", key_to_set="SEI_USUARIO", value_to_set=usuario)
-                #set_key(dotenv_path=".env", key_to_set="SEI_SENHA", value_to_set=senha)
-            #except Exception:
+        if self.checkbox_salvar.isChecked():
+            try:
+                salvar_credencial(usuario, senha)
+            except Exception as e:
                 # não falha a execução apenas loga
-                #print("Não foi possível salvar credenciais")
+                logging.getLogger(__name__).warning("Não foi possível salvar credenciais: %s", e)
 
-        # desativa botão para evitar clicks repetidos e limpa status anteriores
-        btn = self.sender()
-        if isinstance(btn, QPushButton):
-            btn.setEnabled(False)
+        # os tipos já foram lidos das linhas; não alterá-las durante o lote
+        self._interromper_classificacao()
+
+        # trava o formulário até o fim do lote e limpa status anteriores
+        self._bloquear_formulario(True)
         for linha in self._linhas:
             linha.set_status("", "#333")
 
+        # divisão, fila e execução rodam em outra thread; o resultado volta por sinal
+        prioridade = PRIORIDADES[self.combo_prioridade.currentText()]
+        self._execucao = ExecucaoThread(
+            usuario, senha, processo, documentos, prioridade, janela, self.checkbox_dividir.isChecked()
+        )
+        self._execucao.finalizado.connect(self._execucao_finalizada)
+        self._execucao.start()
+
+    def executar_lotes(self):
+        """
+        Executa um arquivo de lotes no formato do --lotes do cli.py: cada
+        conta roda em paralelo, com a senha guardada no cofre. Lotes sem
+        "janela" no arquivo usam a janela selecionada no formulário.
+        """
         try:
-            auto = SEIAutomation()
-            resultados = auto.executar(usuario, senha, processo, documentos)
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Falha na automação:\n{e}")
-            resultados = []
-        finally:
-            if isinstance(btn, QPushButton):
-                btn.setEnabled(True)
+            janela = self._janela_selecionada()
+        except ValueError as e:
+            QMessageBox.warning(self, "Erro", str(e))
+            return
+        caminho, _ = QFileDialog.getOpenFileName(self, "Arquivo de lotes", "", "JSON (*.json)")
+        if not caminho:
+            return
+        self._bloquear_formulario(True)
+        self._execucao = LotesThread(caminho, janela, self.checkbox_dividir.isChecked())
+        self._execucao.finalizado.connect(self._lotes_finalizados)
+        self._execucao.start()
+
+    def _lotes_finalizados(self, resumo, erro):
+        self._bloquear_formulario(False)
+        if erro is not None:
+            QMessageBox.critical(self, "Erro", f"Falha ao executar os lotes:\n{erro}")
+            return
+        linhas = []
+        for usuario, r in resumo.items():
+            linhas.append(f"{usuario}: {r['documentos_ok']} OK, {r['documentos_erro']} erro(s) em {r['tempo']:.1f}s")
+            linhas.extend(f"    {e}" for e in r["erros"])
+        if all(r["documentos_erro"] == 0 for r in resumo.values()):
+            QMessageBox.information(self, "Concluído", "\n".join(linhas))
+        else:
+            QMessageBox.warning(self, "Parcial", "\n".join(linhas))
+
+    def _execucao_finalizada(self, job, resultados, erro):
+        self._bloquear_formulario(False)
+        if isinstance(erro, JobCancelado):
+            QMessageBox.information(self, "Cancelado", "O lote foi cancelado antes de iniciar.")
+            return
+        if erro is not None:
+            QMessageBox.critical(self, "Erro", f"Falha na automação:\n{erro}")
 
         # atualiza status de cada linha
         for linha, ok in zip(self._linhas, resultados):
@@ -374,10 +716,14 @@ class MainWindow(QMainWindow):
             else:
                 linha.set_status("ERRO", "#b22222")
 
+        tempos = ""
+        if job is not None:
+            tempos = f"\n\nEspera na fila: {job.espera:.1f}s | Execução: {job.execucao:.1f}s"
+
         if resultados and all(resultados):
-            QMessageBox.information(self, "Concluído", "Todos os documentos foram processados com sucesso.")
+            QMessageBox.information(self, "Concluído", "Todos os documentos foram processados com sucesso." + tempos)
         elif resultados:
-            QMessageBox.warning(self, "Parcial", "Alguns documentos apresentaram erro. Verifique os status em vermelho.")
+            QMessageBox.warning(self, "Parcial", "Alguns documentos apresentaram erro. Verifique os status em vermelho." + tempos)
 
 
 if __name__ == "__main__":
@@ -6,42 +6,71 @@ from selenium.webdriver.common.keys import Keys
 import os
 from datetime import datetime
 import logging
-import traceback
 import pyautogui
 import time
+from log_config import configurar_logging, ContextoAdapter
 
 
 class SEIAutomation:
-    def __init__(self):
-        self.driver = webdriver.Chrome()
+    def __init__(self, perfil_dir: str = None):
+        """
+        perfil_dir: opcional, diretorio de perfil do Chrome. Sessoes em
+        paralelo precisam de diretorios distintos para nao compartilhar
+        cookies nem disputar o lock do perfil padrao. Com perfil proprio
+        (ex: multi_conta), os atalhos via pyautogui ficam desativados.
+        """
+        options = webdriver.ChromeOptions()
+        if perfil_dir:
+            options.add_argument(f"--user-data-dir={perfil_dir}")
+        self.driver = webdriver.Chrome(options=options)
         self.driver.maximize_window()
         self.wait = WebDriverWait(self.driver, 10)
-        logging.basicConfig(level=logging.INFO)
-        self.logger = logging.getLogger(__name__)
-
-    def executar(self, usuario, senha, processo, documentos: list) -> list:
+        # pyautogui digita na janela em foco, que pode ser o navegador de
+        # outra conta quando ha sessoes em paralelo
+        self.teclado_global = perfil_dir is None
+        configurar_logging()
+        # contexto (processo, indice, fase) anexado a todo registro desta sessao
+        self.logger = ContextoAdapter(logging.getLogger(__name__), {})
+
+    def executar(self, usuario, senha, processo, documentos: list, limitador=None) -> list:
         """
         Retorna uma lista de booleanos indicando sucesso/falha por documento.
-        documentos: lista de dicts com chaves 'tipo' e 'caminho'.
+        documentos: lista de dicts com chaves 'tipo' e 'caminho'; entradas com
+        a chave 'erro' contam como falha sem serem enviadas.
+        limitador: opcional, objeto com metodo adquirir() (ex: TokenBucketCompartilhado do
+        agendador) chamado antes do login e de cada documento.
         """
         resultados = []
         try:
+            self.logger.extra.update(processo=processo, fase="login")
             self.logger.info("Iniciando automacao")
+            if limitador:
+                limitador.adquirir()
             self.login(usuario, senha)
+            self.logger.extra["fase"] = "processo"
             self.buscar_processo(processo)
-            self.logger.info(f"Processo {processo} aberto. Processando {len(documentos)} documento(s)...")
+            self.logger.info("Processo %s aberto. Processando %d documento(s)...", processo, len(documentos))
 
             for i, doc in enumerate(documentos, 1):
                 tipo = doc["tipo"]
                 caminho = doc["caminho"]
-                self.logger.info(f"[{i}/{len(documentos)}] Tipo: {tipo} | Arquivo: {os.path.basename(caminho)}")
+                self.logger.extra.update(indice=i, fase="fila")
+                if doc.get("erro"):
+                    # documento rejeitado numa etapa anterior (ex: divisao de PDF)
+                    self.logger.error("[%d/%d] Ignorado: %s", i, len(documentos), doc["erro"])
+                    resultados.append(False)
+                    continue
+                if limitador:
+                    espera = limitador.adquirir()
+                    if espera > 0.1:
+                        self.logger.info("[%d/%d] Aguardou %.1fs pelo limite de taxa", i, len(documentos), espera)
+                self.logger.info("[%d/%d] Tipo: %s | Arquivo: %s", i, len(documentos), tipo, os.path.basename(caminho))
                 try:
                     self.incluir_documento(tipo, caminho)
                     resultados.append(True)
-                    self.logger.info(f"[{i}/{len(documentos)}] Sucesso.")
+                    self.logger.info("[%d/%d] Sucesso.", i, len(documentos))
                 except Exception as e:
-                    self.logger.error(f"[{i}/{len(documentos)}] Falha: {str(e)}")
-                    self.logger.error(traceback.format_exc())
+                    self.logger.exception("[%d/%d] Falha: %s", i, len(documentos), e)
                     resultados.append(False)
                     try:
                         self.driver.switch_to.default_content()
@@ -49,10 +78,11 @@ class SEIAutomation:
                         pass
 
         except Exception as e:
-            self.logger.error(f"Erro geral: {str(e)}")
-            self.logger.error(traceback.format_exc())
+            self.logger.exception("Erro geral: %s", e)
             raise
         finally:
+            self.logger.extra.pop("indice", None)
+            self.logger.extra["fase"] = "encerramento"
             self.logger.info("Encerrando automacao")
             try:
                 self.driver.quit()
@@ -61,6 +91,13 @@ class SEIAutomation:
 
         return resultados
 
+    def _exigir_teclado_global(self, acao: str):
+        if not self.teclado_global:
+            raise Exception(
+                f"Nao foi possivel {acao} pelo DOM e o fallback via pyautogui esta "
+                "desativado em sessoes paralelas (poderia digitar no navegador de outra conta)"
+            )
+
     def login(self, usuario, senha):
         self.driver.get("https://sei.funprespjud.com.br/")
         self.wait.until(
@@ -96,6 +133,7 @@ class SEIAutomation:
         caracteres especiais como accentos, cedilha, chaves, etc.
         O pyautogui.write() nao consegue digitar esses caracteres corretamente.
         """
+        self._exigir_teclado_global("colar texto")
         import tkinter as tk
 
         # Usa tkinter para copiar para a area de transferencia sem dependencia extra
@@ -108,7 +146,7 @@ class SEIAutomation:
         time.sleep(0.3)
         pyautogui.hotkey("ctrl", "v")
         time.sleep(0.5)
-        self.logger.info(f"Texto colado via Ctrl+V: {texto}")
+        self.logger.info("Texto colado via Ctrl+V: %s", texto)
 
         root.destroy()
 
@@ -118,7 +156,8 @@ class SEIAutomation:
         tipo_documento: texto exato que aparece no <select> do SEI (ex: 'Comprovante').
         caminho_arquivo: caminho absoluto do PDF a ser anexado.
         """
-        self.logger.info(f"Incluindo '{tipo_documento}' | {caminho_arquivo}")
+        self.logger.extra["fase"] = "incluir"
+        self.logger.info("Incluindo '%s' | %s", tipo_documento, caminho_arquivo)
         self.driver.implicitly_wait(5)
 
         # ────────────────────────────────────────────────
@@ -126,7 +165,7 @@ class SEIAutomation:
         # ────────────────────────────────────────────────
         for tentativa in range(3):
             try:
-                self.logger.info(f"Tentativa {tentativa + 1}: clicar em 'Incluir Documento'")
+                self.logger.info("Tentativa %d: clicar em 'Incluir Documento'", tentativa + 1)
                 try:
                     frame = self.wait.until(
                         EC.presence_of_element_located((By.NAME, "ifrConteudoVisualizacao"))
@@ -193,7 +232,7 @@ class SEIAutomation:
                         continue
 
             except Exception as e:
-                self.logger.error(f"Erro tentativa {tentativa + 1}: {e}")
+                self.logger.error("Erro tentativa %d: %s", tentativa + 1, e)
                 if tentativa == 2:
                     raise
             try:
@@ -205,6 +244,7 @@ class SEIAutomation:
         # ────────────────────────────────────────────────
         # PARTE 3 — Preencher formulario
         # ────────────────────────────────────────────────
+        self.logger.extra["fase"] = "formulario"
         self.logger.info("Preenchendo formulario")
         self.driver.switch_to.default_content()
         time.sleep(2)
@@ -264,7 +304,7 @@ class SEIAutomation:
                     f"Selecao incorreta: esperado '{tipo_documento}', obtido '{valor_selecionado}'"
                 )
 
-            self.logger.info(f"Tipo de Documento '{tipo_documento}' selecionado")
+            self.logger.info("Tipo de Documento '%s' selecionado", tipo_documento)
             time.sleep(2)
 
             # Data atual
@@ -272,7 +312,7 @@ class SEIAutomation:
             self.driver.execute_script(
                 f"document.getElementById('txtDataElaboracao').value = '{data_atual}';"
             )
-            self.logger.info(f"Data: {data_atual}")
+            self.logger.info("Data: %s", data_atual)
 
             # Nato-digital
             self.driver.execute_script("""
@@ -302,7 +342,7 @@ class SEIAutomation:
 
             if not nivel:
                 raise Exception("Nenhum nivel de acesso disponivel")
-            self.logger.info(f"Nivel de acesso: {nivel}")
+            self.logger.info("Nivel de acesso: %s", nivel)
             time.sleep(1)
 
             # Verificacoes finais
@@ -315,10 +355,10 @@ class SEIAutomation:
             if not pub and not res:
                 raise Exception("Nivel de acesso nao foi selecionado")
 
-            self.logger.info(f"Formulario OK: Nato={nato}, Publico={pub}, Restrito={res}")
+            self.logger.info("Formulario OK: Nato=%s, Publico=%s, Restrito=%s", nato, pub, res)
 
         except Exception as e:
-            self.logger.error(f"Erro no formulario: {e}")
+            self.logger.error("Erro no formulario: %s", e)
             raise
 
         # ────────────────────────────────────────────────
@@ -327,6 +367,7 @@ class SEIAutomation:
         # SEM tornar o elemento visivel (evita abertura do
         # explorador de arquivos nativo do Windows).
         # ────────────────────────────────────────────────
+        self.logger.extra["fase"] = "anexo"
         self.logger.info("Anexando arquivo...")
 
         self.wait.until(EC.presence_of_element_located((By.ID, "frmAnexos")))
@@ -334,7 +375,7 @@ class SEIAutomation:
         # Normaliza o caminho para barras invertidas (padrao Windows)
         # e garante que caracteres especiais (acentos, etc.) sejam preservados
         caminho_arquivo = os.path.normpath(caminho_arquivo)
-        self.logger.info(f"Caminho do arquivo: {caminho_arquivo}")
+        self.logger.info("Caminho do arquivo: %s", caminho_arquivo)
 
         # Selenium interage com input[type=file] oculto diretamente,
         # sem precisar alterar CSS ou tornar o elemento visivel.
@@ -353,6 +394,7 @@ class SEIAutomation:
         self.logger.info("Arquivo anexado com sucesso")
         time.sleep(2)
 
+        self.logger.extra["fase"] = "salvar"
         # Clica no botao Salvar direto pelo DOM — sem pyautogui
         salvo = self.driver.execute_script("""
             // Tenta pelos IDs mais comuns do SEI
@@ -374,14 +416,15 @@ class SEIAutomation:
         """)
 
         if salvo:
-            self.logger.info(f"Botao Salvar clicado via DOM ({salvo})")
+            self.logger.info("Botao Salvar clicado via DOM (%s)", salvo)
         else:
             # Fallback com pyautogui caso o botao nao seja localizado no DOM
+            self._exigir_teclado_global("salvar o documento")
             self.logger.warning("Botao Salvar nao localizado no DOM — usando pyautogui como fallback")
             pyautogui.press("tab")
             time.sleep(0.5)
             pyautogui.press("enter")
 
         time.sleep(3)
-        self.logger.info(f"Documento '{os.path.basename(caminho_arquivo)}' salvo no SEI")
+        self.logger.info("Documento '%s' salvo no SEI", os.path.basename(caminho_arquivo))
         self.driver.switch_to.default_content()
\ No newline at end of file
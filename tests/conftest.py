@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# os modulos do projeto ficam na raiz do repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def criar_pdf():
+    """
+    Grava um PDF com `paginas` paginas em branco. A largura da pagina i e
+    100 + i, o que permite conferir a ordem das paginas depois de dividir.
+    """
+    pypdf = pytest.importorskip("pypdf")
+
+    def criar(caminho, paginas=1):
+        writer = pypdf.PdfWriter()
+        for i in range(paginas):
+            writer.add_blank_page(width=100 + i, height=100)
+        with open(caminho, "wb") as f:
+            writer.write(f)
+        return str(caminho)
+
+    return criar
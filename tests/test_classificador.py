@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from classificador import ClassificadorTipos, REGRAS_PADRAO, obter_classificador
+
+
+@pytest.fixture
+def padrao():
+    return ClassificadorTipos(REGRAS_PADRAO)
+
+
+def test_primeira_regra_que_casa_vence(padrao):
+    # casa com Comprovante e Requerimento; Comprovante vem antes na lista
+    assert padrao.classificar("requerimento_com_comprovante.pdf") == "Comprovante"
+    invertido = ClassificadorTipos([REGRAS_PADRAO[3], REGRAS_PADRAO[0]])
+    assert invertido.classificar("requerimento_com_comprovante.pdf") == "Requerimento"
+
+
+@pytest.mark.parametrize("nome, tipo", [
+    ("Ofício 123.pdf", "Oficio"),
+    ("RELATÓRIO final.pdf", "Relatorio"),
+    ("Solicitação de férias.pdf", "Requerimento"),
+    ("contracheque_03.PDF", "Demonstrativo"),
+])
+def test_ignora_acentos_e_caixa(padrao, nome, tipo):
+    assert padrao.classificar(nome) == tipo
+
+
+def test_sem_regra_correspondente_retorna_none(padrao):
+    assert padrao.classificar("foto_123.pdf") is None
+
+
+def test_extensao_nao_participa_da_classificacao():
+    classificador_pdf = ClassificadorTipos([{"padrao": r"pdf", "tipo": "Qualquer"}])
+    assert classificador_pdf.classificar("documento.pdf") is None
+
+
+def test_regra_com_alternativas_e_ancoras():
+    regras = [{"padrao": r"^nf[-_ ]?\d+$", "tipo": "Nota"}, {"padrao": r"nf", "tipo": "Outro"}]
+    c = ClassificadorTipos(regras)
+    assert c.classificar("NF-0042.pdf") == "Nota"
+    assert c.classificar("copia nf 42.pdf") == "Outro"
+
+
+@pytest.mark.parametrize("regras", [
+    [],
+    [{"padrao": "x"}],
+    [{"padrao": 1, "tipo": "X"}],
+    [{"padrao": "(abc", "tipo": "X"}],
+    [{"padrao": r"(a)\1", "tipo": "X"}],
+    [{"padrao": r"(?P<nome>a)", "tipo": "X"}],
+    [{"padrao": r"(?i)abc", "tipo": "X"}],
+    "nao e lista",
+])
+def test_rejeita_regras_invalidas(regras):
+    with pytest.raises(ValueError):
+        ClassificadorTipos(regras)
+
+
+def test_escapes_e_grupos_sem_captura_sao_aceitos():
+    c = ClassificadorTipos([{"padrao": r"\(copia\)|(?:anexo)\s\d", "tipo": "Anexo"}])
+    assert c.classificar("contrato (copia).pdf") == "Anexo"
+    assert c.classificar("anexo 2.pdf") == "Anexo"
+
+
+@pytest.fixture
+def sem_cache(monkeypatch):
+    monkeypatch.delenv("SEI_CLASSIFICAR_TEXTO", raising=False)
+    obter_classificador.cache_clear()
+    yield
+    obter_classificador.cache_clear()
+
+
+def test_obter_classificador_usa_arquivo_de_regras(tmp_path, monkeypatch, sem_cache):
+    arquivo = tmp_path / "regras.json"
+    arquivo.write_text(json.dumps([{"padrao": "laudo", "tipo": "Laudo"}]), encoding="utf-8")
+    monkeypatch.setenv("SEI_REGRAS_TIPOS", str(arquivo))
+    assert obter_classificador().classificar("laudo medico.pdf") == "Laudo"
+
+
+@pytest.mark.parametrize("conteudo", ["{invalido", json.dumps([{"padrao": "(?P<x>a)", "tipo": "X"}])])
+def test_obter_classificador_cai_nas_regras_padrao(tmp_path, monkeypatch, sem_cache, conteudo):
+    arquivo = tmp_path / "regras.json"
+    arquivo.write_text(conteudo, encoding="utf-8")
+    monkeypatch.setenv("SEI_REGRAS_TIPOS", str(arquivo))
+    c = obter_classificador()
+    assert c.tipos == [r["tipo"] for r in REGRAS_PADRAO]
+    assert c.classificar("oficio 1.pdf") == "Oficio"
+
+
+def test_classificar_texto_usa_primeira_pagina_so_quando_ativado(monkeypatch):
+    pytest.importorskip("pypdf")
+    lidos = []
+
+    def texto(caminho):
+        lidos.append(caminho)
+        return "OFÍCIO Nº 12/2026"
+
+    monkeypatch.setattr("classificador.texto_primeira_pagina", texto)
+    com_texto = ClassificadorTipos(REGRAS_PADRAO, usar_texto=True)
+    assert com_texto.classificar_texto("scan.pdf") == "Oficio"
+    # o nome tem prioridade e evita ler o PDF
+    assert com_texto.classificar("recibo.pdf", "recibo.pdf") == "Comprovante"
+    assert com_texto.classificar("scan_002.pdf", "scan_002.pdf") == "Oficio"
+    assert lidos == ["scan.pdf", "scan_002.pdf"]
+
+    sem_texto = ClassificadorTipos(REGRAS_PADRAO)
+    assert sem_texto.classificar_texto("scan.pdf") is None
+    assert sem_texto.classificar("scan.pdf", "scan.pdf") is None
+    assert lidos == ["scan.pdf", "scan_002.pdf"]
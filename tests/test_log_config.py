@@ -0,0 +1,101 @@
+import sys
+import json
+import logging
+
+import pytest
+
+from log_config import BufferCircular, ContextoAdapter, FormatadorJson, FormatadorTexto, QueueHandlerAdiado
+
+
+class Coletor(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.registros = []
+
+    def emit(self, record):
+        self.registros.append(record)
+
+
+@pytest.fixture
+def coletor():
+    logger = logging.getLogger("tests.log_config")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = Coletor()
+    logger.addHandler(handler)
+    yield logger, handler
+    logger.removeHandler(handler)
+
+
+def _registro(msg="Documento %d de %d", args=(1, 3), **contexto):
+    record = logging.LogRecord("sei", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(contexto)
+    return record
+
+
+def test_formatador_json_inclui_contexto():
+    dados = json.loads(FormatadorJson().format(_registro(processo="00001/2026", indice=2, fase="anexo")))
+    assert dados["mensagem"] == "Documento 1 de 3"
+    assert dados["nivel"] == "INFO"
+    assert dados["logger"] == "sei"
+    assert (dados["processo"], dados["indice"], dados["fase"]) == ("00001/2026", 2, "anexo")
+
+
+def test_formatador_json_omite_contexto_ausente_e_inclui_excecao():
+    try:
+        raise ValueError("falhou")
+    except ValueError:
+        record = _registro(fase="login")
+        record.exc_info = sys.exc_info()
+    dados = json.loads(FormatadorJson().format(record))
+    assert "processo" not in dados and "indice" not in dados
+    assert dados["fase"] == "login"
+    assert "ValueError: falhou" in dados["excecao"]
+
+
+def test_formatador_texto_prefixa_contexto():
+    linha = FormatadorTexto().format(_registro(processo="123", indice=4))
+    assert linha.endswith("[processo=123 indice=4] Documento 1 de 3")
+    assert FormatadorTexto().format(_registro()).endswith("INFO    Documento 1 de 3")
+
+
+def test_buffer_circular_retorna_apenas_linhas_novas():
+    buffer = BufferCircular(tamanho=10)
+    buffer.setFormatter(logging.Formatter("%(message)s"))
+    for i in range(3):
+        buffer.handle(_registro("linha %d", (i,)))
+    todas = buffer.novas()
+    assert [linha for _, _, linha in todas] == ["linha 0", "linha 1", "linha 2"]
+    assert buffer.novas(todas[-1][0]) == []
+    buffer.handle(_registro("linha %d", (3,)))
+    assert [linha for _, _, linha in buffer.novas(todas[-1][0])] == ["linha 3"]
+
+
+def test_buffer_circular_descarta_linhas_mais_antigas():
+    buffer = BufferCircular(tamanho=3)
+    buffer.setFormatter(logging.Formatter("%(message)s"))
+    for i in range(5):
+        buffer.handle(_registro("linha %d", (i,)))
+    novas = buffer.novas()
+    assert [linha for _, _, linha in novas] == ["linha 2", "linha 3", "linha 4"]
+    # a numeracao continua crescendo mesmo apos o descarte
+    assert [seq for seq, _, _ in novas] == [3, 4, 5]
+
+
+def test_contexto_adapter_mescla_extra(coletor):
+    logger, handler = coletor
+    adapter = ContextoAdapter(logger, {"processo": "1", "fase": "login"})
+    adapter.info("a")
+    adapter.extra["fase"] = "anexo"
+    adapter.info("b", extra={"indice": 7})
+    primeiro, segundo = handler.registros
+    assert (primeiro.processo, primeiro.fase) == ("1", "login")
+    assert (segundo.processo, segundo.fase, segundo.indice) == ("1", "anexo", 7)
+    assert adapter.extra == {"processo": "1", "fase": "anexo"}
+
+
+def test_queue_handler_adiado_nao_formata_na_thread_que_loga():
+    record = _registro()
+    preparado = QueueHandlerAdiado(None).prepare(record)
+    assert preparado.msg == "Documento %d de %d"
+    assert preparado.args == (1, 3)
@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+import multi_conta
+from multi_conta import carregar_lotes, executar_contas
+from scheduler import PRIORIDADES, JanelaHorario
+
+
+class JobFalso:
+    espera = 1.0
+    execucao = 2.0
+
+    def __init__(self, processo, documentos):
+        self.processo = processo
+        self.documentos = documentos
+
+
+class AgendadorFalso:
+    """
+    Responde cada lote conforme `respostas[processo]`: uma excecao, uma
+    funcao que recebe os documentos submetidos ou, por padrao, tudo OK.
+    """
+
+    def __init__(self, respostas=None):
+        self.respostas = respostas or {}
+        self.submetidos = []
+
+    def submeter(self, usuario, senha, processo, documentos, prioridade=None, janela=None, fabrica=None):
+        self.submetidos.append({"usuario": usuario, "senha": senha, "processo": processo,
+                                "documentos": documentos, "janela": janela})
+        return JobFalso(processo, documentos)
+
+    def aguardar(self, job, cancelado=None):
+        resposta = self.respostas.get(job.processo)
+        if isinstance(resposta, Exception):
+            raise resposta
+        if callable(resposta):
+            return resposta(job.documentos)
+        return [True] * len(job.documentos)
+
+
+@pytest.fixture(autouse=True)
+def cofre(monkeypatch, tmp_path):
+    senhas = {"ana": "s1", "bia": "s2"}
+    monkeypatch.setattr(multi_conta, "obter_senha", senhas.get)
+    monkeypatch.setenv("SEI_DIRETORIO_PERFIS", str(tmp_path / "perfis"))
+    return senhas
+
+
+def _lote(usuario, processo, *caminhos):
+    return {"usuario": usuario, "processo": processo,
+            "documentos": [{"tipo": "Documentos", "caminho": c} for c in caminhos]}
+
+
+def test_conta_sem_senha_conta_todos_os_documentos_como_erro():
+    agendador = AgendadorFalso()
+    resumo = executar_contas([_lote("caio", "1", "a.pdf", "b.pdf"), _lote("ana", "2", "c.pdf")], agendador)
+    assert resumo["caio"]["documentos_erro"] == 2
+    assert resumo["caio"]["documentos_ok"] == 0
+    assert "caio" in resumo["caio"]["erros"][0]
+    assert resumo["ana"]["documentos_ok"] == 1
+    assert [s["usuario"] for s in agendador.submetidos] == ["ana"]
+
+
+def test_lote_com_falha_nao_afeta_os_demais_lotes_da_conta():
+    agendador = AgendadorFalso({"1": RuntimeError("SEI fora do ar"), "3": lambda docs: [True, False]})
+    lotes = [_lote("ana", "1", "a.pdf"), _lote("ana", "2", "b.pdf"), _lote("ana", "3", "c.pdf", "d.pdf")]
+    resumo = executar_contas(lotes, agendador)["ana"]
+    assert resumo["documentos_ok"] == 2
+    assert resumo["documentos_erro"] == 2
+    assert resumo["erros"] == ["Processo 1: SEI fora do ar"]
+    assert [l["resultados"] for l in resumo["lotes"]] == [[], [True], [True, False]]
+    assert resumo["lotes"][1]["espera"] == 1.0
+
+
+def test_falha_inesperada_fica_no_resumo_da_conta(monkeypatch):
+    original = multi_conta._executar_conta
+
+    def executar_conta(agendador, usuario, *args):
+        if usuario == "bia":
+            raise RuntimeError("perfil bloqueado")
+        return original(agendador, usuario, *args)
+
+    monkeypatch.setattr(multi_conta, "_executar_conta", executar_conta)
+    resumo = executar_contas([_lote("ana", "1", "a.pdf"), _lote("bia", "2", "b.pdf", "c.pdf")], AgendadorFalso())
+    assert resumo["ana"]["documentos_ok"] == 1
+    assert resumo["bia"]["erros"] == ["perfil bloqueado"]
+    assert resumo["bia"]["documentos_erro"] == 2
+
+
+def test_dividir_reagrupa_resultados_por_documento_original(tmp_path, monkeypatch, criar_pdf):
+    monkeypatch.setenv("SEI_LIMITE_UPLOAD_MB", str(1500 / 1024 / 1024))
+    pequeno = criar_pdf(tmp_path / "pequeno.pdf", 2)
+    grande = criar_pdf(tmp_path / "grande.pdf", 40)
+    # falha apenas a ultima parte do arquivo grande
+    agendador = AgendadorFalso({"1": lambda docs: [True] * (len(docs) - 1) + [False]})
+
+    resumo = executar_contas([_lote("ana", "1", pequeno, grande)], agendador, dividir=True)["ana"]
+
+    submetidos = agendador.submetidos[0]["documentos"]
+    assert len(submetidos) > 2
+    assert resumo["lotes"][0]["resultados"] == [True, False]
+    assert (resumo["documentos_ok"], resumo["documentos_erro"]) == (1, 1)
+
+
+def test_carregar_lotes(tmp_path):
+    pasta = tmp_path / "docs"
+    pasta.mkdir()
+    for nome in ("b.pdf", "a.PDF", "notas.txt"):
+        (pasta / nome).write_bytes(b"")
+    arquivo = tmp_path / "lotes.json"
+    arquivo.write_text(json.dumps([
+        {"usuario": "ana", "processo": "1", "pasta": str(pasta), "tipo": "Oficio", "janela": "22-6"},
+        {"usuario": "bia", "processo": "2", "pasta": str(pasta), "prioridade": "urgente"},
+    ]), encoding="utf-8")
+
+    lotes = carregar_lotes(str(arquivo), janela_padrao=JanelaHorario(19, 7))
+
+    assert [d["caminho"] for d in lotes[0]["documentos"]] == [str(pasta / "a.PDF"), str(pasta / "b.pdf")]
+    assert {d["tipo"] for d in lotes[0]["documentos"]} == {"Oficio"}
+    assert str(lotes[0]["janela"]) == "22h-6h"
+    assert str(lotes[1]["janela"]) == "19h-7h"
+    assert lotes[1]["prioridade"] == PRIORIDADES["urgente"]
+
+
+def test_carregar_lotes_rejeita_pasta_inexistente(tmp_path):
+    arquivo = tmp_path / "lotes.json"
+    arquivo.write_text(json.dumps([{"usuario": "ana", "processo": "1", "pasta": str(tmp_path / "x")}]))
+    with pytest.raises(ValueError):
+        carregar_lotes(str(arquivo))
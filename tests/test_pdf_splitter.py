@@ -0,0 +1,100 @@
+import os
+import re
+
+import pytest
+
+from pdf_splitter import (
+    agrupar_resultados, dividir_arquivo, dividir_documentos, documentos_divididos, listar_pdfs,
+)
+
+pypdf = pytest.importorskip("pypdf")
+
+LIMITE = 1500
+
+
+def _larguras(caminho):
+    return [int(p.mediabox.width) for p in pypdf.PdfReader(caminho).pages]
+
+
+def test_dividir_arquivo_respeita_limite_ordem_e_nomes(tmp_path, criar_pdf):
+    origem = criar_pdf(tmp_path / "extrato.pdf", 40)
+    destino = tmp_path / "partes"
+    destino.mkdir()
+
+    partes = dividir_arquivo(origem, LIMITE, str(destino))
+
+    assert len(partes) > 1
+    assert all(os.path.getsize(p) <= LIMITE for p in partes)
+    assert [os.path.basename(p) for p in partes] == [
+        f"extrato (parte {i} de {len(partes)}).pdf" for i in range(1, len(partes) + 1)
+    ]
+    paginas = [largura for p in partes for largura in _larguras(p)]
+    assert paginas == [100 + i for i in range(40)]
+
+
+def test_dividir_documentos_mantem_pequenos_e_marca_origem(tmp_path, criar_pdf):
+    pequeno = criar_pdf(tmp_path / "a.pdf", 2)
+    grande = criar_pdf(tmp_path / "b.pdf", 40)
+    documentos = [{"tipo": "Oficio", "caminho": pequeno}, {"tipo": "Extrato", "caminho": grande}]
+
+    resultado = dividir_documentos(documentos, str(tmp_path), LIMITE, max_workers=1)
+
+    assert resultado[0] == {"tipo": "Oficio", "caminho": pequeno, "origem": 0}
+    assert len(resultado) > 2
+    assert all(d["origem"] == 1 and d["tipo"] == "Extrato" for d in resultado[1:])
+    assert all(re.search(r"\(parte \d+ de \d+\)\.pdf$", d["caminho"]) for d in resultado[1:])
+
+
+def test_arquivo_que_nao_pode_ser_dividido_vira_entrada_com_erro(tmp_path, criar_pdf):
+    ilegivel = tmp_path / "corrompido.pdf"
+    ilegivel.write_bytes(b"nao e um pdf" * 200)
+    # com limite de 400 bytes, uma unica pagina em branco ja passa do limite
+    pagina_grande = criar_pdf(tmp_path / "pagina.pdf", 3)
+    ok = tmp_path / "ok.pdf"
+    ok.write_bytes(b"%PDF-1.4")
+    documentos = [{"tipo": "T", "caminho": str(c)} for c in (ilegivel, pagina_grande, ok)]
+
+    resultado = dividir_documentos(documentos, str(tmp_path), 400, max_workers=1)
+
+    assert [d["origem"] for d in resultado] == [0, 1, 2]
+    assert "corrompido.pdf" in resultado[0]["erro"]
+    assert "pagina.pdf" in resultado[1]["erro"]
+    assert "erro" not in resultado[2]
+
+
+def test_documentos_divididos_apaga_diretorio_temporario(tmp_path, criar_pdf):
+    grande = criar_pdf(tmp_path / "grande.pdf", 40)
+    with documentos_divididos([{"tipo": "T", "caminho": grande}], LIMITE, max_workers=1) as partes:
+        diretorio = os.path.dirname(partes[0]["caminho"])
+        assert os.path.isdir(diretorio)
+        assert all(os.path.isfile(p["caminho"]) for p in partes)
+    assert not os.path.exists(diretorio)
+    assert os.path.isfile(grande)
+
+
+def test_documentos_divididos_apaga_diretorio_mesmo_com_erro(tmp_path, criar_pdf):
+    grande = criar_pdf(tmp_path / "grande.pdf", 40)
+    with pytest.raises(RuntimeError):
+        with documentos_divididos([{"tipo": "T", "caminho": grande}], LIMITE, max_workers=1) as partes:
+            diretorio = os.path.dirname(partes[0]["caminho"])
+            raise RuntimeError("falha no lote")
+    assert not os.path.exists(diretorio)
+
+
+def test_agrupar_resultados_por_documento_original():
+    documentos = [{"origem": 0}, {"origem": 1}, {"origem": 1}, {"origem": 2}]
+    assert agrupar_resultados(documentos, [True, True, True, False], 3) == [True, True, False]
+    assert agrupar_resultados(documentos, [True, True, False, True], 3) == [True, False, True]
+
+
+def test_agrupar_resultados_incompletos_contam_como_falha():
+    documentos = [{"origem": 0}, {"origem": 1}, {"origem": 1}, {"origem": 2}]
+    # a automacao parou depois da primeira parte do segundo documento
+    assert agrupar_resultados(documentos, [True, True], 3) == [True, False, False]
+    assert agrupar_resultados(documentos, [], 3) == []
+
+
+def test_listar_pdfs(tmp_path):
+    for nome in ("b.pdf", "A.PDF", "c.txt"):
+        (tmp_path / nome).write_bytes(b"")
+    assert listar_pdfs(str(tmp_path)) == ["A.PDF", "b.pdf"]
@@ -0,0 +1,243 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from scheduler import (
+    Agendador, EstadoCompartilhado, JanelaHorario, JobCancelado, TokenBucketCompartilhado,
+    PRIORIDADE_LOTE, PRIORIDADE_NORMAL, PRIORIDADE_URGENTE,
+)
+
+
+class AutomacaoFalsa:
+    """Substitui SEIAutomation: registra a ordem de execucao e a concorrencia."""
+
+    def __init__(self, registro, liberar=None, duracao=0.0):
+        self.registro = registro
+        self.liberar = liberar
+        self.duracao = duracao
+
+    def executar(self, usuario, senha, processo, documentos, limitador=None):
+        with self.registro["lock"]:
+            self.registro["ordem"].append(processo)
+            self.registro["ativos"] += 1
+            self.registro["pico"] = max(self.registro["pico"], self.registro["ativos"])
+        if self.liberar is not None:
+            self.liberar.wait(5)
+        time.sleep(self.duracao)
+        with self.registro["lock"]:
+            self.registro["ativos"] -= 1
+        return [True] * len(documentos)
+
+
+@pytest.fixture
+def registro():
+    return {"lock": threading.Lock(), "ordem": [], "ativos": 0, "pico": 0}
+
+
+@pytest.fixture
+def estado(tmp_path):
+    return EstadoCompartilhado(str(tmp_path / "agendador.db"))
+
+
+def test_token_bucket_libera_rajada_e_depois_segue_a_taxa(estado):
+    bucket = TokenBucketCompartilhado(estado, taxa=20, capacidade=2)
+    assert bucket.adquirir() < 0.05
+    assert bucket.adquirir() < 0.05
+    espera = bucket.adquirir()
+    assert 0.03 <= espera < 0.2
+
+
+@pytest.mark.parametrize("taxa, capacidade", [(0, 1), (-1, 1), (1, 0)])
+def test_token_bucket_rejeita_parametros_invalidos(estado, taxa, capacidade):
+    with pytest.raises(ValueError):
+        TokenBucketCompartilhado(estado, taxa, capacidade)
+
+
+def test_token_bucket_compartilhado_soma_consumo_de_instancias(tmp_path):
+    caminho = str(tmp_path / "agendador.db")
+    a = TokenBucketCompartilhado(EstadoCompartilhado(caminho), taxa=20, capacidade=2)
+    b = TokenBucketCompartilhado(EstadoCompartilhado(caminho), taxa=20, capacidade=2)
+    assert a.adquirir() < 0.05
+    assert b.adquirir() < 0.05
+    assert a.adquirir() >= 0.03
+
+
+@pytest.mark.parametrize("hora, esperado", [(19, True), (23, True), (0, True), (6, True), (7, False), (12, False)])
+def test_janela_atravessando_meia_noite(hora, esperado):
+    janela = JanelaHorario(19, 7)
+    assert janela.permite(datetime(2026, 1, 10, hora, 30)) is esperado
+
+
+@pytest.mark.parametrize("hora, esperado", [(7, False), (8, True), (16, True), (17, False)])
+def test_janela_no_mesmo_dia(hora, esperado):
+    assert JanelaHorario(8, 17).permite(datetime(2026, 1, 10, hora, 0)) is esperado
+
+
+def test_janela_com_inicio_igual_ao_fim_sempre_permite():
+    assert JanelaHorario(5, 5).permite(datetime(2026, 1, 10, 14, 0))
+
+
+def test_segundos_ate_abrir():
+    janela = JanelaHorario(19, 7)
+    assert janela.segundos_ate_abrir(datetime(2026, 1, 10, 18, 30)) == 1800
+    assert janela.segundos_ate_abrir(datetime(2026, 1, 10, 22, 0)) == 0
+    # janela do dia seguinte: das 17h30 ate as 8h
+    assert JanelaHorario(8, 17).segundos_ate_abrir(datetime(2026, 1, 10, 17, 30)) == 14.5 * 3600
+
+
+@pytest.mark.parametrize("texto", ["19", "a-b", "19-7-1", "24-7"])
+def test_janela_de_texto_invalida(texto):
+    with pytest.raises(ValueError):
+        JanelaHorario.de_texto(texto)
+
+
+def test_agendador_executa_por_prioridade(estado, registro):
+    liberar = threading.Event()
+    agendador = Agendador(
+        max_concorrencia=1, estado=estado, fabrica=lambda: AutomacaoFalsa(registro),
+    )
+    try:
+        # ocupa a unica vaga enquanto os demais entram na fila
+        bloqueio = agendador.submeter(
+            "u", "s", "bloqueio", [{}], fabrica=lambda: AutomacaoFalsa(registro, liberar),
+        )
+        while not registro["ordem"]:
+            time.sleep(0.01)
+        jobs = [
+            agendador.submeter("u", "s", "lote", [{}], prioridade=PRIORIDADE_LOTE),
+            agendador.submeter("u", "s", "normal-1", [{}], prioridade=PRIORIDADE_NORMAL),
+            agendador.submeter("u", "s", "urgente", [{}], prioridade=PRIORIDADE_URGENTE),
+            agendador.submeter("u", "s", "normal-2", [{}], prioridade=PRIORIDADE_NORMAL),
+        ]
+        liberar.set()
+        for job in [bloqueio] + jobs:
+            assert job.aguardar(timeout=10) == [True]
+    finally:
+        agendador.encerrar()
+    assert registro["ordem"] == ["bloqueio", "urgente", "normal-1", "normal-2", "lote"]
+
+
+def test_agendador_respeita_concorrencia_entre_instancias(tmp_path, registro, monkeypatch):
+    # a vaga liberada por outra instancia so e vista na proxima consulta
+    monkeypatch.setattr("scheduler.INTERVALO_CONSULTA", 0.02)
+    caminho = str(tmp_path / "agendador.db")
+    fabrica = lambda: AutomacaoFalsa(registro, duracao=0.3)
+    agendadores = [
+        Agendador(max_concorrencia=2, estado=EstadoCompartilhado(caminho), fabrica=fabrica)
+        for _ in range(2)
+    ]
+    try:
+        jobs = [
+            agendadores[i % 2].submeter("u", "s", f"p{i}", [{}])
+            for i in range(6)
+        ]
+        for job in jobs:
+            assert job.aguardar(timeout=30) == [True]
+    finally:
+        for agendador in agendadores:
+            agendador.encerrar()
+    assert len(registro["ordem"]) == 6
+    assert registro["pico"] == 2
+
+
+def test_encerrar_cancela_jobs_pendentes(estado, registro):
+    agendador = Agendador(max_concorrencia=1, estado=estado, fabrica=lambda: AutomacaoFalsa(registro))
+    job = agendador.submeter("u", "s", "fora", [{}], janela=_janela_fechada())
+    agendador.encerrar()
+    with pytest.raises(JobCancelado):
+        job.aguardar(timeout=5)
+    assert registro["ordem"] == []
+
+
+def _janela_fechada():
+    hora = datetime.now().hour
+    return JanelaHorario((hora + 2) % 24, (hora + 3) % 24)
+
+
+def test_cancelar_retira_job_da_fila(estado, registro):
+    agendador = Agendador(estado=estado, fabrica=lambda: AutomacaoFalsa(registro))
+    try:
+        job = agendador.submeter("u", "s", "noturno", [{}], janela=_janela_fechada())
+        assert agendador.cancelar(job)
+        with pytest.raises(JobCancelado):
+            job.aguardar(timeout=5)
+        assert agendador.pendentes() == 0
+        assert not agendador.cancelar(job)
+    finally:
+        agendador.encerrar()
+    assert registro["ordem"] == []
+
+
+def test_cancelar_nao_interrompe_job_em_execucao(estado, registro, monkeypatch):
+    monkeypatch.setattr("scheduler.INTERVALO_CONSULTA", 0.05)
+    liberar = threading.Event()
+    cancelado = threading.Event()
+    agendador = Agendador(estado=estado, fabrica=lambda: AutomacaoFalsa(registro, liberar))
+    try:
+        job = agendador.submeter("u", "s", "p", [{}])
+        while not registro["ordem"]:
+            time.sleep(0.01)
+        cancelado.set()
+        threading.Timer(0.2, liberar.set).start()
+        assert agendador.aguardar(job, cancelado) == [True]
+    finally:
+        agendador.encerrar()
+
+
+def test_aguardar_cancela_job_na_fila(estado, registro, monkeypatch):
+    monkeypatch.setattr("scheduler.INTERVALO_CONSULTA", 0.05)
+    cancelado = threading.Event()
+    agendador = Agendador(estado=estado, fabrica=lambda: AutomacaoFalsa(registro))
+    try:
+        job = agendador.submeter("u", "s", "noturno", [{}], janela=_janela_fechada())
+        threading.Timer(0.1, cancelado.set).start()
+        with pytest.raises(JobCancelado):
+            agendador.aguardar(job, cancelado)
+    finally:
+        agendador.encerrar()
+
+
+class EstadoFalhando(EstadoCompartilhado):
+    """Simula o SQLite travado por outro processo nas operacoes indicadas."""
+
+    def __init__(self, caminho, falhas):
+        super().__init__(caminho)
+        self.falhas = falhas
+
+    def _falhar(self, operacao):
+        if self.falhas.get(operacao, 0) > 0:
+            self.falhas[operacao] -= 1
+            raise sqlite3.OperationalError("database is locked")
+
+    def ocupar_vaga(self, *args):
+        self._falhar("ocupar_vaga")
+        return super().ocupar_vaga(*args)
+
+    def liberar(self, job_id):
+        self._falhar("liberar")
+        super().liberar(job_id)
+
+
+def test_job_conclui_mesmo_se_liberar_a_vaga_falhar(tmp_path, registro):
+    estado = EstadoFalhando(str(tmp_path / "agendador.db"), {"liberar": 1})
+    agendador = Agendador(estado=estado, fabrica=lambda: AutomacaoFalsa(registro))
+    try:
+        job = agendador.submeter("u", "s", "p", [{}])
+        assert job.aguardar(timeout=5) == [True]
+    finally:
+        agendador.encerrar()
+
+
+def test_despachante_sobrevive_a_erro_do_sqlite(tmp_path, registro, monkeypatch):
+    monkeypatch.setattr("scheduler.INTERVALO_CONSULTA", 0.05)
+    estado = EstadoFalhando(str(tmp_path / "agendador.db"), {"ocupar_vaga": 2})
+    agendador = Agendador(estado=estado, fabrica=lambda: AutomacaoFalsa(registro))
+    try:
+        job = agendador.submeter("u", "s", "p", [{}])
+        assert job.aguardar(timeout=5) == [True]
+        assert agendador._despachante.is_alive()
+    finally:
+        agendador.encerrar()